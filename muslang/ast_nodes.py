@@ -17,8 +17,9 @@ Node Hierarchy:
     └── Import
 """
 
+import sys
 from dataclasses import dataclass, field
-from typing import Optional, List, Union, Literal, Dict
+from typing import Optional, List, Tuple, Union, Literal, Dict, Iterator
 
 
 @dataclass(frozen=True)
@@ -47,7 +48,11 @@ class ASTNode:
     Attributes:
         location: Optional source location where this node was defined
     """
-    location: Optional[SourceLocation]
+    # Empty so that slotted subclasses don't also get a per-instance __dict__
+    __slots__ = ()
+    
+    # Class-level default for nodes that declare no location field of their own
+    location: Optional[SourceLocation] = None
     
     def __init__(self, location: Optional[SourceLocation] = None):
         """Initialize with optional location."""
@@ -63,7 +68,7 @@ class ASTNode:
 # Note and Rest Nodes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Note(ASTNode):
     """
     A musical note or chord (single or multiple pitches played simultaneously).
@@ -77,7 +82,8 @@ class Note(ASTNode):
     All pitches in a chord share the same timing and modifiers.
     
     Attributes:
-        pitches: List of (pitch, octave, accidental) tuples. Single note has 1 pitch, chord has 2+.
+        pitches: Tuple of (pitch, octave, accidental) tuples. Single note has 1 pitch, chord has 2+.
+                 Lists are accepted and converted to a tuple on construction.
                  pitch: Note pitch (c, d, e, f, g, a, or b)
                  octave: Octave number (0-9, C4 = middle C)
                  accidental: Sharp (+), flat (-), or natural (=) modifier, or None
@@ -95,7 +101,7 @@ class Note(ASTNode):
         Chord:        pitches=[('c', 4, None), ('e', 4, None), ('g', 4, None)], duration=4
         With accidentals: pitches=[('c', 4, 'sharp'), ('e', 4, None), ('g', 4, 'flat')], duration=4
     """
-    pitches: List[tuple[Literal['c', 'd', 'e', 'f', 'g', 'a', 'b'], int, Optional[Literal['sharp', 'flat', 'natural']]]] = field(default_factory=list)
+    pitches: Tuple[tuple[Literal['c', 'd', 'e', 'f', 'g', 'a', 'b'], int, Optional[Literal['sharp', 'flat', 'natural']]], ...] = ()
     duration: Optional[int] = None
     dotted: bool = False
     location: Optional[SourceLocation] = None
@@ -107,6 +113,11 @@ class Note(ASTNode):
     articulation: Optional[str] = None
     dynamic_level: Optional[str] = None
     
+    def __post_init__(self):
+        # Pitches never change after construction; a tuple is smaller and hashable
+        if type(self.pitches) is not tuple:
+            self.pitches = tuple(self.pitches)
+    
     @property
     def is_chord(self) -> bool:
         """Returns True if this Note represents a chord (2+ pitches)."""
@@ -133,7 +144,7 @@ class Note(ASTNode):
         return f"Note({pitch_strs}{dur_str}{dot_str}){loc_str}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Rest(ASTNode):
     """
     A musical rest (silence).
@@ -159,7 +170,7 @@ class Rest(ASTNode):
         return f"Rest({dur_str}{dot_str}){loc_str}"
 
 
-@dataclass
+@dataclass(slots=True)
 class PercussionNote(ASTNode):
     """
     A percussion/drum hit.
@@ -195,7 +206,7 @@ class PercussionNote(ASTNode):
 # Articulation Nodes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Articulation(ASTNode):
     """
     Articulation marking that affects how notes are played.
@@ -221,6 +232,10 @@ class Articulation(ASTNode):
     scope: Literal['composition', 'instrument', 'voice'] = 'voice'
     location: Optional[SourceLocation] = None
     
+    def __post_init__(self):
+        # Interned so state comparisons against literals short-circuit on identity
+        self.type = sys.intern(str(self.type))
+    
     def __repr__(self) -> str:
         persist_str = "" if self.persistent else " (one-shot)"
         loc_str = f" at {self.location}" if self.location else ""
@@ -274,7 +289,7 @@ class Tremolo(ASTNode):
         return f"Tremolo(.tremolo{note_str}){loc_str}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Reset(ASTNode):
     """
     Reset articulation or dynamics by popping from their respective stacks.
@@ -304,7 +319,7 @@ class Reset(ASTNode):
 # Dynamic Nodes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class DynamicLevel(ASTNode):
     """
     Absolute dynamic level (volume).
@@ -325,6 +340,10 @@ class DynamicLevel(ASTNode):
     level: Literal['pp', 'p', 'mp', 'mf', 'f', 'ff']
     scope: Literal['composition', 'instrument', 'voice'] = 'voice'
     
+    def __post_init__(self):
+        # Interned so state comparisons against literals short-circuit on identity
+        self.level = sys.intern(str(self.level))
+    
     def __repr__(self) -> str:
         loc_str = f" at {self.location}" if self.location else ""
         return f"Dynamic(.{self.level}){loc_str}"
@@ -351,6 +370,12 @@ class DynamicTransition(ASTNode):
     target_level: Optional[Literal['pp', 'p', 'mp', 'mf', 'f', 'ff']] = None
     scope: Literal['composition', 'instrument', 'voice'] = 'voice'
     
+    def __post_init__(self):
+        # Interned so state comparisons against literals short-circuit on identity
+        self.type = sys.intern(str(self.type))
+        if self.target_level is not None:
+            self.target_level = sys.intern(str(self.target_level))
+    
     def __repr__(self) -> str:
         target_str = f" to {self.target_level}" if self.target_level else ""
         loc_str = f" at {self.location}" if self.location else ""
@@ -409,7 +434,7 @@ class Expression(ASTNode):
 # Rhythm Modifier Nodes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class GraceNote(ASTNode):
     """
     Grace note (ornamental quick note before the main note).
@@ -430,7 +455,7 @@ class GraceNote(ASTNode):
         return f"GraceNote(~{slash_str}{self.note}){loc_str}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Tuplet(ASTNode):
     """
     Tuplet grouping (triplets, quintuplets, etc.).
@@ -463,7 +488,7 @@ class Tuplet(ASTNode):
 # Phrase Grouping Nodes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Slide(ASTNode):
     """
     Slide/glissando between two notes.
@@ -495,7 +520,7 @@ class Slide(ASTNode):
         return f"Slide(<{style_str}{self.from_note} -> {self.to_note}>){loc_str}"
 
 
-@dataclass
+@dataclass(slots=True)
 class Measure(ASTNode):
     """
     Measure grouping (events between bar lines).
@@ -530,7 +555,7 @@ class Measure(ASTNode):
 # Structural Nodes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Instrument(ASTNode):
     """
     Instrument part containing events.
@@ -558,8 +583,37 @@ class Instrument(ASTNode):
         loc_str = f" at {self.location}" if self.location else ""
         return f"Instrument({self.name}: {num_events} events{voice_str}){loc_str}"
 
-
-@dataclass
+    def iter_notes(self, voice_num: int = 1) -> Iterator[Note]:
+        """
+        Yield the notes of one voice in source order without building a list.
+
+        Descends into measures, tuplets, grace notes and slides; directives,
+        rests and percussion hits are skipped.
+
+        Args:
+            voice_num: Voice number to iterate (defaults to voice 1)
+        """
+        return _iter_event_notes(self.voices[voice_num])
+
+
+def _iter_event_notes(events: List[ASTNode]) -> Iterator[Note]:
+    """Yield every Note reachable from an event list (see Instrument.iter_notes)."""
+    for event in events:
+        event_type = type(event)
+        if event_type is Note:
+            yield event
+        elif event_type is Measure:
+            yield from _iter_event_notes(event.events)
+        elif event_type is Tuplet:
+            yield from event.notes
+        elif event_type is GraceNote:
+            yield event.note
+        elif event_type is Slide:
+            yield event.from_note
+            yield event.to_note
+
+
+@dataclass(slots=True)
 class Voice(ASTNode):
     """
     Voice declaration for polyphonic parts.
@@ -614,7 +668,7 @@ class Sequence(ASTNode):
 # Musical Context Nodes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class TimeSignature(ASTNode):
     """
     Time signature (meter) directive.
@@ -83,6 +83,16 @@ VELOCITY_F = 100
 VELOCITY_FF = 115
 """Velocity for fortissimo (ff) - very loud."""
 
+VELOCITY_BY_LEVEL = {
+    'pp': VELOCITY_PP,
+    'p': VELOCITY_P,
+    'mp': VELOCITY_MP,
+    'mf': VELOCITY_MF,
+    'f': VELOCITY_F,
+    'ff': VELOCITY_FF,
+}
+"""Dynamic level name -> MIDI velocity."""
+
 # ============================================================================
 # Accent Boosts
 # ============================================================================
@@ -9,6 +9,7 @@ Generates MIDI files from analyzed AST. Handles:
 - Timing and velocity calculations
 """
 
+import io
 from midiutil import MIDIFile
 from muslang.ast_nodes import *
 from muslang.drums import get_drum_midi_note, is_percussion_instrument
@@ -228,9 +229,42 @@ class MIDIGenerator:
             ast: Analyzed AST (Sequence node with instruments dict)
             output_path: Path to output MIDI file
         """
+        self._build(ast)
+        
+        # Write MIDI file
+        with open(output_path, 'wb') as f:
+            self.midi.writeFile(f)
+    
+    def generate_to_buffer(self, ast: Sequence) -> bytes:
+        """
+        Generate MIDI data from AST without touching the filesystem.
+        
+        Args:
+            ast: Analyzed AST (Sequence node with instruments dict)
+        
+        Returns:
+            Standard MIDI file contents
+        """
+        self._build(ast)
+        
+        buffer = io.BytesIO()
+        self.midi.writeFile(buffer)
+        return buffer.getvalue()
+    
+    def _build(self, ast: Sequence):
+        """
+        Populate self.midi with the events for every instrument in the AST.
+        
+        Args:
+            ast: Analyzed AST (Sequence node with instruments dict)
+        """
         # Store composition defaults for instrument processing
         self.composition_defaults = ast.composition_defaults if ast.composition_defaults else {}
         
+        # Channels belong to the file being built, so a reused generator starts over
+        self.channel_counter = 0
+        self.instrument_channels = {}
+        
         # Get instruments from dict
         if not ast.instruments:
             raise ValueError("No instruments found in composition")
@@ -247,10 +281,6 @@ class MIDIGenerator:
         # Process each instrument
         for track_num, instrument in enumerate(instruments):
             self._process_instrument(track_num, instrument)
-        
-        # Write MIDI file
-        with open(output_path, 'wb') as f:
-            self.midi.writeFile(f)
     
     def _process_instrument(self, track_num: int, instrument: Instrument):
         """
@@ -607,30 +637,17 @@ class MIDIGenerator:
                 return time_ticks + from_duration_ticks + to_duration_ticks
             
             step_duration_ticks = max(1, from_duration_ticks // (num_steps + 1))
+            duration_beats = step_duration_ticks / self.ppq
+            add_note = self.midi.addNote
             
-            current_pitch = from_midi
-            current_time_ticks = time_ticks
-            
-            # Generate intermediate steps
-            while current_pitch != to_midi:
-                time_beats = current_time_ticks / self.ppq
-                duration_beats = step_duration_ticks / self.ppq
-                
-                self.midi.addNote(
-                    track, channel, current_pitch,
+            # Chromatic ramp from source to destination (inclusive) as an
+            # arithmetic progression; step i starts i step-durations in
+            for i, pitch in enumerate(range(from_midi, to_midi + step, step)):
+                time_beats = (time_ticks + i * step_duration_ticks) / self.ppq
+                add_note(
+                    track, channel, pitch,
                     time_beats, duration_beats, velocity
                 )
-                
-                current_pitch += step
-                current_time_ticks += step_duration_ticks
-            
-            # Final note
-            time_beats = current_time_ticks / self.ppq
-            duration_beats = step_duration_ticks / self.ppq
-            self.midi.addNote(
-                track, channel, to_midi,
-                time_beats, duration_beats, velocity
-            )
 
             # Sustain destination note for explicit to-note duration
             sustain_time_beats = (time_ticks + from_duration_ticks) / self.ppq
@@ -495,7 +495,7 @@ class MuslangTransformer(Transformer):
             self.current_duration = duration
         
         return Note(
-            pitches=[(pitch, octave, accidental)],
+            pitches=((pitch, octave, accidental),),
             duration=duration,
             dotted=dotted,
         )
@@ -587,7 +587,7 @@ class MuslangTransformer(Transformer):
             Note with multiple pitches
         """
         # Collect all pitches (tuples)
-        pitches = [item for item in items if isinstance(item, tuple)]
+        pitches = tuple(item for item in items if isinstance(item, tuple))
         
         # Extract optional duration and dotted
         duration = None
@@ -1021,6 +1021,17 @@ class MuslangTransformer(Transformer):
 # Parser Entry Point
 # ============================================================================
 
+# Build the LALR tables once at import time; parse_muslang reuses this instance.
+with open(Path(__file__).parent / "grammar.lark", 'r') as _grammar_file:
+    _PARSER = Lark(
+        _grammar_file.read(),
+        start='start',
+        parser='lalr',  # Use LALR - the grammar is designed for it
+        propagate_positions=True,  # Enable line/column tracking
+        maybe_placeholders=False,
+    )
+
+
 def parse_muslang(source: str, filename: str = "<string>") -> Sequence:
     """
     Parse Muslang so with LALR algorithm, parses the source, and transforms it into an AST.
@@ -1048,24 +1059,9 @@ def parse_muslang(source: str, filename: str = "<string>") -> Sequence:
         >>> print(ast.events[0].name)
         piano
     """
-    # Load grammar from file
-    grammar_path = Path(__file__).parent / "grammar.lark"
-    
-    with open(grammar_path, 'r') as f:
-        grammar = f.read()
-    
-    # Create Lark parser with LALR algorithm (efficient, unambiguous grammar)
-    parser = Lark(
-        grammar,
-        start='start',
-        parser='lalr',  # Use LALR - the grammar is designed for it
-        propagate_positions=True,  # Enable line/column tracking
-        maybe_placeholders=False,
-    )
-    
     try:
         # Parse the source code
-        parse_tree = parser.parse(source)
+        parse_tree = _PARSER.parse(source)
         
         # Transform parse tree to AST
         transformer = MuslangTransformer()
@@ -6,8 +6,102 @@ Validates AST, resolves references, expands constructs, and calculates timing.
 from muslang.ast_nodes import *
 from muslang.config import *
 from muslang import theory
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, NamedTuple, Union
 from dataclasses import replace
+from fractions import Fraction
+from functools import lru_cache
+
+
+# Sounding events that may only appear inside a voice
+NON_VOICE_NOTE_TYPES = (Note, Rest, PercussionNote, Slide, GraceNote, Tuplet)
+
+
+# Exact tick count: a plain int whenever the value is whole (the common case
+# with PPQ 480), otherwise a Fraction. The two mix without rounding
+Ticks = Union[int, Fraction]
+
+# Exact dotted-note multiplier for rational tick arithmetic
+_DOT_FRACTION = Fraction(DOT_MULTIPLIER)
+
+
+def _exact_ticks(value: Fraction) -> Ticks:
+    """Narrow a whole-number Fraction to int so later sums stay in int arithmetic"""
+    return value.numerator if value.denominator == 1 else value
+
+
+@lru_cache(maxsize=None)
+def _duration_to_ticks_cached(duration: int, dotted: bool) -> Ticks:
+    """Tick length of a (duration, dotted) pair; scores reuse only a handful"""
+    # A whole note = 4 quarter notes = 4 * PPQ ticks
+    ticks = Fraction(4 * DEFAULT_MIDI_PPQ, duration)
+    
+    if dotted:
+        ticks *= _DOT_FRACTION
+    
+    return _exact_ticks(ticks)
+
+
+@lru_cache(maxsize=None)
+def _measure_ticks(numerator: int, denominator: int) -> Ticks:
+    """Exact length of one measure of numerator/denominator time, in ticks"""
+    # (numerator / denominator) whole notes, each 4 quarter notes * PPQ
+    return _exact_ticks(Fraction(numerator * 4 * DEFAULT_MIDI_PPQ, denominator))
+
+
+@lru_cache(maxsize=None)
+def _transition_ramp(start_velocity: int, target_velocity: int) -> Tuple[int, ...]:
+    """
+    Velocities of successive notes under a crescendo/diminuendo.
+    
+    Each note moves DYNAMIC_TRANSITION_STEP towards the target and then holds
+    there, so the whole ramp is known when the transition starts.
+    """
+    step = DYNAMIC_TRANSITION_STEP if target_velocity >= start_velocity else -DYNAMIC_TRANSITION_STEP
+    return tuple(range(start_velocity + step, target_velocity, step)) + (target_velocity,)
+
+
+class VoiceState:
+    """
+    Mutable articulation/dynamic state for one voice during state tracking.
+    
+    The current articulation and (dynamic level, base velocity) are the tops of
+    their stacks; the stack lists hold the values saved beneath them. Index 0
+    of each stack is a permanent copy of the system default, so a reset can
+    always read stack[-1] and trim the stack without checking its depth.
+    
+    The stacks stay plain lists rather than deques: they are only a few
+    entries deep, the current value lives outside them, and the reset trim
+    relies on slice deletion, which deque does not support.
+    """
+    
+    __slots__ = (
+        'articulation', 'articulation_stack',
+        'dynamic_level', 'velocity', 'dynamic_top', 'dynamic_stack',
+        'transition_active', 'transition_ramp', 'transition_position',
+        'instrument_defaults', 'composition_defaults',
+    )
+    
+    def __init__(self):
+        self.articulation = 'natural'
+        self.articulation_stack: List[str] = ['natural']
+        self.dynamic_level = 'mf'
+        self.velocity = VELOCITY_MF
+        self.dynamic_top = ('mf', VELOCITY_MF)
+        self.dynamic_stack: List[tuple] = [('mf', VELOCITY_MF)]
+        self.transition_active: Optional[str] = None
+        self.transition_ramp: Tuple[int, ...] = ()
+        self.transition_position = 0
+        self.instrument_defaults: Dict[str, Any] = {}
+        self.composition_defaults: Dict[str, Any] = {}
+    
+    def copy(self) -> 'VoiceState':
+        """Return an independent copy (stacks are copied, saved values shared)"""
+        clone = VoiceState.__new__(VoiceState)
+        for name in VoiceState.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.articulation_stack = self.articulation_stack.copy()
+        clone.dynamic_stack = self.dynamic_stack.copy()
+        return clone
 
 
 class SemanticError(Exception):
@@ -15,17 +109,76 @@ class SemanticError(Exception):
     pass
 
 
+# Warning code -> message template, formatted only when warnings are read
+WARNING_TEMPLATES = {
+    'unusual_tempo': "Unusual tempo: {} BPM",
+    'large_slide': "Large slide interval: {} semitones",
+}
+
+
+class WarningRecord(NamedTuple):
+    """An unformatted analyzer warning: a WARNING_TEMPLATES code and its arguments"""
+    code: str
+    args: tuple
+    
+    @property
+    def message(self) -> str:
+        return WARNING_TEMPLATES[self.code].format(*self.args)
+
+
 class SemanticAnalyzer:
     """Semantic analysis and AST transformation"""
     
+    # Fixed length of every grace note, resolved once from config
+    _GRACE_TICKS = DEFAULT_MIDI_PPQ * GRACE_NOTE_DURATION_RATIO
+    
     def __init__(self):
+        # Exact node type -> timing handler; types without one take no time
+        self._timing_handlers = {
+            Note: self._time_sounding_event,
+            Rest: self._time_sounding_event,
+            PercussionNote: self._time_sounding_event,
+            Tuplet: self._time_tuplet,
+            GraceNote: self._time_grace_note,
+            Slide: self._time_slide,
+            Measure: self._time_measure,
+            Tempo: self._time_tempo,
+            TimeSignature: self._time_time_signature,
+        }
+        # Exact node type -> state handler; built once per analyzer instance
+        self._state_handlers = {
+            Articulation: self._apply_articulation_state,
+            Reset: self._apply_reset_state,
+            DynamicLevel: self._apply_dynamic_level_state,
+            DynamicTransition: self._apply_dynamic_transition_state,
+            Note: self._apply_note_state,
+            PercussionNote: self._apply_percussion_state,
+            Tuplet: self._apply_tuplet_state,
+            GraceNote: self._apply_grace_note_state,
+            Slide: self._apply_slide_state,
+            Measure: self._apply_measure_state,
+        }
+        # Reset.type -> stack pop for that scope
+        self._reset_handlers = {
+            'articulation': self._reset_articulation_state,
+            'dynamic': self._reset_dynamic_state,
+        }
+        self.reset()
+    
+    def reset(self):
+        """Clear all analysis state so the analyzer can be reused for another AST"""
         self.current_time_sig = TimeSignature(numerator=4, denominator=4)
         self.current_key_sig: Optional[KeySignature] = None
         self.current_tempo = DEFAULT_TEMPO
         self.current_instrument_name: Optional[str] = None
         self.composition_defaults: Dict[str, Any] = {}  # Composition-level defaults
         self.errors: List[str] = []
-        self.warnings: List[str] = []
+        self.warning_records: List[WarningRecord] = []
+    
+    @property
+    def warnings(self) -> List[str]:
+        """Formatted warning messages, in the order they were recorded"""
+        return [record.message for record in self.warning_records]
         
     def analyze(self, ast: Sequence) -> Sequence:
         """Main entry point for semantic analysis"""
@@ -41,11 +194,9 @@ class SemanticAnalyzer:
         # Phase 3: Expand ornaments
         ast = self._expand_ornaments(ast)
 
-        # Phase 4: Calculate timing
-        ast = self._calculate_timing(ast)
-
-        # Phase 5: Track state with scope chain
-        ast = self._track_state(ast)
+        # Phases 4-5: Calculate timing and track state with scope chain,
+        # fused into one walk over each voice
+        ast = self._calculate_timing_and_state(ast)
         
         if self.errors:
             raise SemanticError("\n".join(self.errors))
@@ -54,6 +205,12 @@ class SemanticAnalyzer:
     
     def _validate_ast(self, node: ASTNode, instrument_name: Optional[str] = None):
         """Validate AST structure"""
+        slides: List[Slide] = []
+        self._validate_node(node, instrument_name, slides)
+        self._check_slide_intervals(slides)
+    
+    def _validate_node(self, node: ASTNode, instrument_name: Optional[str], slides: List[Slide]):
+        """Validate one node and its children, collecting slides for a batched check"""
         if isinstance(node, Note):
             # Validate pitch range for all pitches
             for pitch, octave, accidental in node.pitches:
@@ -65,11 +222,8 @@ class SemanticAnalyzer:
                 self._error(f"Invalid duration: {node.duration}")
         
         elif isinstance(node, Slide):
-            # Check pitch interval
-            from_midi = self._note_to_midi(node.from_note)
-            to_midi = self._note_to_midi(node.to_note)
-            if abs(from_midi - to_midi) > 24:
-                self._warning(f"Large slide interval: {abs(from_midi - to_midi)} semitones")
+            # Pitch interval is checked for all slides at once afterwards
+            slides.append(node)
         
         elif isinstance(node, Tuplet):
             if node.ratio < 2:
@@ -95,7 +249,7 @@ class SemanticAnalyzer:
         
         elif isinstance(node, Tempo):
             if node.bpm < 20 or node.bpm > 400:
-                self._warning(f"Unusual tempo: {node.bpm} BPM")
+                self._warning('unusual_tempo', node.bpm)
 
         elif isinstance(node, Instrument):
             instrument_name = node.name
@@ -104,18 +258,31 @@ class SemanticAnalyzer:
                     f"Instrument '{node.name}' must declare at least one explicit voice"
                 )
 
-            non_voice_note_types = (
-                Note, Rest, PercussionNote, Slide, GraceNote, Tuplet
-            )
             for event in node.events:
-                if isinstance(event, non_voice_note_types):
+                if isinstance(event, NON_VOICE_NOTE_TYPES):
                     self._error(
                         f"Instrument '{node.name}' contains {type(event).__name__} outside voice context"
                     )
         
         # Recursively validate children
         for child in self._get_children(node):
-            self._validate_ast(child, instrument_name)
+            self._validate_node(child, instrument_name, slides)
+    
+    def _check_slide_intervals(self, slides: List[Slide]):
+        """Warn about slides spanning more than two octaves"""
+        if not slides:
+            return
+        
+        endpoints = []
+        for slide in slides:
+            endpoints.append(slide.from_note)
+            endpoints.append(slide.to_note)
+        midi = self._notes_to_midi(endpoints)
+        
+        for from_midi, to_midi in zip(midi[::2], midi[1::2]):
+            interval = abs(to_midi - from_midi)
+            if interval > 24:
+                self._warning('large_slide', interval)
     
     def _apply_key_signatures(self, node: ASTNode) -> ASTNode:
         """Apply key signature accidentals to notes"""
@@ -127,7 +294,7 @@ class SemanticAnalyzer:
                 root += '+'
             elif node.accidental == 'flat':
                 root += '-'
-            key_info = theory.KeySignatureInfo(root, node.mode)
+            key_info = theory.get_key_signature(root, node.mode)
             self.current_key_sig = key_info
             return node
         
@@ -139,37 +306,55 @@ class SemanticAnalyzer:
         return self._transform_children(node, self._apply_key_signatures)
     
     def _expand_ornaments(self, node: ASTNode) -> ASTNode:
-        """Expand ornaments into note sequences"""
+        """
+        Expand ornaments into note sequences.
+        
+        Subtrees without ornament markers are returned as-is, so scores that
+        use no ornaments pass through this phase without being rebuilt.
+        """
         if isinstance(node, Instrument):
             previous_instrument_name = self.current_instrument_name
             self.current_instrument_name = node.name
             # Process voice events
             expanded_voices = {}
+            changed = False
             for voice_num, voice_events in node.voices.items():
-                expanded_voices[voice_num] = self._expand_event_list_with_ornaments(voice_events)
+                expanded = self._expand_event_list_with_ornaments(voice_events)
+                changed = changed or expanded is not voice_events
+                expanded_voices[voice_num] = expanded
 
             self.current_instrument_name = previous_instrument_name
-            return replace(node, voices=expanded_voices)
+            return replace(node, voices=expanded_voices) if changed else node
         
         elif isinstance(node, Sequence):
             if node.instruments:
                 # Top-level sequence - process instruments
                 expanded_instruments = {}
+                changed = False
                 for name, inst in node.instruments.items():
-                    expanded_instruments[name] = self._expand_ornaments(inst)
-                return replace(node, instruments=expanded_instruments)
+                    expanded = self._expand_ornaments(inst)
+                    changed = changed or expanded is not inst
+                    expanded_instruments[name] = expanded
+                return replace(node, instruments=expanded_instruments) if changed else node
             else:
                 # Sub-sequence - process events list
-                return replace(node, events=self._expand_event_list_with_ornaments(node.events))
+                expanded = self._expand_event_list_with_ornaments(node.events)
+                return replace(node, events=expanded) if expanded is not node.events else node
 
         elif isinstance(node, Measure):
-            return replace(node, events=self._expand_event_list_with_ornaments(node.events))
+            expanded = self._expand_event_list_with_ornaments(node.events)
+            return replace(node, events=expanded) if expanded is not node.events else node
         
         return node
 
     def _expand_event_list_with_ornaments(self, events: List[ASTNode]) -> List[ASTNode]:
-        """Expand Ornament/Tremolo markers followed by note within an event list."""
+        """
+        Expand Ornament/Tremolo markers followed by note within an event list.
+        
+        Returns the original list when nothing in it changed.
+        """
         expanded_events: List[ASTNode] = []
+        changed = False
         i = 0
 
         while i < len(events):
@@ -191,14 +376,16 @@ class SemanticAnalyzer:
 
                 next_note = events[i + 1]
                 expanded_events.extend(self._expand_single_ornament(event, next_note))
+                changed = True
                 i += 2
                 continue
 
             processed = self._expand_ornaments(event)
+            changed = changed or processed is not event
             expanded_events.append(processed)
             i += 1
 
-        return expanded_events
+        return expanded_events if changed else events
     
     def _expand_single_ornament(self, ornament: ASTNode, note: Note) -> List[Note]:
         """Expand a single ornament into notes using theory module"""
@@ -212,155 +399,160 @@ class SemanticAnalyzer:
     
     def _calculate_timing(self, node: ASTNode) -> ASTNode:
         """Calculate absolute timing for all events"""
+        return self._map_instruments(node, self._time_instrument)
+    
+    def _time_instrument(self, node: Instrument) -> Instrument:
+        """Time each voice of an instrument; each voice starts at time 0 independently"""
+        previous_instrument_name = self.current_instrument_name
+        self.current_instrument_name = node.name
+        updated_voices = {}
+        calculate_event_timing = self._calculate_event_timing
+        for voice_num, voice_events in node.voices.items():
+            current_time: Ticks = 0
+            updated_events: List[ASTNode] = []
+            append = updated_events.append
+            for event in voice_events:
+                event_with_timing, duration = calculate_event_timing(event, current_time)
+                append(event_with_timing)
+                current_time += duration
+            updated_voices[voice_num] = updated_events
+        
+        self.current_instrument_name = previous_instrument_name
+        return replace(node, voices=updated_voices)
+    
+    def _map_instruments(self, node: ASTNode, process_instrument) -> ASTNode:
+        """
+        Rebuild node with process_instrument applied to every Instrument in it.
+        
+        Shared walk for the timing and state passes: a top-level sequence maps
+        its instruments dict, a sub-sequence its events list.
+        """
         if isinstance(node, Instrument):
-            previous_instrument_name = self.current_instrument_name
-            self.current_instrument_name = node.name
-            # Process voices - each voice starts at time 0 independently
-            updated_voices = {}
-            for voice_num, voice_events in node.voices.items():
-                current_time = 0.0
-                updated_events = []
-                for event in voice_events:
-                    event_with_timing, duration = self._calculate_event_timing(event, current_time)
-                    updated_events.append(event_with_timing)
-                    current_time += duration
-                updated_voices[voice_num] = updated_events
-
-            self.current_instrument_name = previous_instrument_name
-            return replace(node, voices=updated_voices)
+            return process_instrument(node)
         
         elif isinstance(node, Sequence):
-            # Process instruments
-            updated_instruments = {}
             if node.instruments:
-                # Process instruments in order (dict maintains insertion order in Python 3.7+)
-                # Time signatures are already injected into voice streams by parser
+                # Dict preserves instrument order; time signatures are already
+                # injected into voice streams by the parser.
+                # Instruments are processed serially on purpose: the passes are
+                # pure-Python object work that threads cannot overlap under the
+                # GIL, and they share analyzer state (current time signature,
+                # tempo and instrument name, errors)
+                updated_instruments = {}
                 for name, inst in node.instruments.items():
-                    updated_instruments[name] = self._calculate_timing(inst)
-                return replace(node, instruments=updated_instruments, events=node.events)
+                    updated_instruments[name] = process_instrument(inst)
+                return replace(node, instruments=updated_instruments)
             else:
                 # Sub-sequence - process events
-                updated_events = []
-                for event in node.events:
-                    updated_events.append(self._calculate_timing(event))
-                return replace(node, events=updated_events)
+                map_instruments = self._map_instruments
+                return replace(node, events=[map_instruments(event, process_instrument) for event in node.events])
         
         return node
     
-    def _calculate_event_timing(self, event: ASTNode, start_time: float) -> tuple[ASTNode, float]:
+    def _calculate_event_timing(self, event: ASTNode, start_time: Ticks) -> Tuple[ASTNode, Ticks]:
         """
         Calculate timing for a single event.
         Returns (updated_event, duration_in_ticks)
-        """
-        if isinstance(event, Note):
-            duration_ticks = self._duration_to_ticks(event.duration or DEFAULT_NOTE_DURATION, event.dotted)
-            end_time = start_time + duration_ticks
-            updated_note = replace(event, start_time=start_time, end_time=end_time)
-            return updated_note, duration_ticks
-        
-        elif isinstance(event, Rest):
-            duration_ticks = self._duration_to_ticks(event.duration or DEFAULT_NOTE_DURATION, event.dotted)
-            end_time = start_time + duration_ticks
-            updated_rest = replace(event, start_time=start_time, end_time=end_time)
-            return updated_rest, duration_ticks
-        
-        elif isinstance(event, PercussionNote):
-            duration_ticks = self._duration_to_ticks(event.duration or DEFAULT_NOTE_DURATION, event.dotted)
-            end_time = start_time + duration_ticks
-            updated_perc = replace(event, start_time=start_time, end_time=end_time)
-            return updated_perc, duration_ticks
-        
-        elif isinstance(event, Tuplet):
-            # Tuplets scale time: ratio notes fit into actual_duration space
-            # For example, triplet (ratio=3) fits 3 notes in space of 2
-            actual_ticks = self._duration_to_ticks(event.actual_duration, False)
-            time_per_note = actual_ticks / event.ratio
-            
-            current_tuplet_time = start_time
-            updated_notes = []
-            
-            for note in event.notes:
-                # Each note in tuplet gets scaled duration
-                end_time = current_tuplet_time + time_per_note
-                updated_note = replace(note, start_time=current_tuplet_time, end_time=end_time)
-                updated_notes.append(updated_note)
-                current_tuplet_time += time_per_note
-            
-            return replace(event, notes=updated_notes), actual_ticks
-        
-        elif isinstance(event, GraceNote):
-            # Grace note steals time from beginning (small fixed duration)
-            # Grace notes don't count toward measure duration per musical convention
-            grace_duration = DEFAULT_MIDI_PPQ * GRACE_NOTE_DURATION_RATIO
-            end_time = start_time + grace_duration
-            updated_grace_note = replace(event.note, start_time=start_time, end_time=end_time)
-            return replace(event, note=updated_grace_note), 0  # Return 0 - grace notes don't count toward bar
-        
-        elif isinstance(event, Slide):
-            # Slide consumes both note durations:
-            # from_note = glide duration, to_note = destination sustain duration
-            from_note_updated, from_duration = self._calculate_event_timing(event.from_note, start_time)
-            to_note_updated, to_duration = self._calculate_event_timing(
-                event.to_note,
-                start_time + from_duration,
-            )
-            total_duration = from_duration + to_duration
-            return replace(
-                event,
-                from_note=from_note_updated,
-                to_note=to_note_updated,
-            ), total_duration
-        
-        elif isinstance(event, Measure):
-            # Process all events in measure and validate duration
-            current_measure_time = start_time
-            updated_events = []
-            grace_note_duration_total = 0.0
-            
-            for measure_event in event.events:
-                updated_event, duration = self._calculate_event_timing(measure_event, current_measure_time)
-                updated_events.append(updated_event)
-                current_measure_time += duration
-                
-                # Track grace notes separately - they don't count toward measure duration
-                if isinstance(measure_event, GraceNote):
-                    grace_note_duration_total += duration
-            
-            total_duration = current_measure_time - start_time
-            
-            # Subtract grace note durations from total - they don't count toward time signature
-            counted_duration = total_duration - grace_note_duration_total
-            
-            # Validate measure duration against current time signature
-            self._validate_measure(event, counted_duration)
-            
-            return replace(
-                event,
-                events=updated_events,
-                start_time=start_time,
-                end_time=current_measure_time
-            ), total_duration
-        
-        elif isinstance(event, Tempo):
-            # Tempo changes affect subsequent timing but don't consume time themselves
-            self.current_tempo = event.bpm
-            return event, 0.0
-        
-        elif isinstance(event, TimeSignature):
-            # Time signature changes affect beat calculation but don't consume time
-            # Update the current time signature for subsequent measures
-            self.current_time_sig = event
-            return event, 0.0
-        
-        elif isinstance(event, (KeySignature, Pan, Articulation, DynamicLevel, DynamicTransition, DynamicAccent, Reset, Ornament, Tremolo, Expression)):
-            # These directives don't consume time
-            return event, 0.0
         
-        else:
-            # Unknown event type, doesn't consume time
-            return event, 0.0
+        Times are kept exact (int when whole, else Fraction) while they accumulate
+        and are only converted to float when stored on a node, so tuplets and
+        dotted notes never drift.
+        """
+        handler = self._timing_handlers.get(type(event))
+        if handler is None:
+            # Timeless directives and unknown event types don't consume time
+            return event, 0
+        return handler(event, start_time)
+    
+    def _time_sounding_event(self, event: ASTNode, start_time: Ticks) -> Tuple[ASTNode, Ticks]:
+        """Time a Note, Rest or PercussionNote from its own duration"""
+        # Calls the cached conversion directly, skipping the method frame
+        duration_ticks = _duration_to_ticks_cached(event.duration or DEFAULT_NOTE_DURATION, event.dotted)
+        end_time = start_time + duration_ticks
+        return replace(event, start_time=float(start_time), end_time=float(end_time)), duration_ticks
+    
+    def _time_tuplet(self, event: Tuplet, start_time: Ticks) -> Tuple[ASTNode, Ticks]:
+        """Tuplets scale time: ratio notes fit into actual_duration space"""
+        # For example, triplet (ratio=3) fits 3 notes in space of 2
+        actual_ticks = _duration_to_ticks_cached(event.actual_duration, False)
+        # Whole-tick steps (e.g. triplets at PPQ 480) stay in int arithmetic
+        time_per_note = _exact_ticks(Fraction(actual_ticks, event.ratio))
+        
+        # Each note in tuplet gets scaled duration. Boundaries are computed
+        # as start + i * step (like a linspace) rather than by repeated
+        # addition, so rounding error does not build up across the tuplet
+        boundaries = [float(start_time + i * time_per_note) for i in range(len(event.notes) + 1)]
+        updated_notes = [
+            replace(note, start_time=note_start, end_time=note_end)
+            for note, note_start, note_end in zip(event.notes, boundaries, boundaries[1:])
+        ]
+        
+        return replace(event, notes=updated_notes), actual_ticks
+    
+    def _time_grace_note(self, event: GraceNote, start_time: Ticks) -> Tuple[ASTNode, Ticks]:
+        """Grace note steals time from beginning (small fixed duration)"""
+        # Grace notes don't count toward measure duration per musical convention
+        grace_start = float(start_time)
+        updated_grace_note = replace(event.note, start_time=grace_start, end_time=grace_start + self._GRACE_TICKS)
+        return replace(event, note=updated_grace_note), 0  # Return 0 - grace notes don't count toward bar
+    
+    def _time_slide(self, event: Slide, start_time: Ticks) -> Tuple[ASTNode, Ticks]:
+        """Slide consumes both note durations"""
+        # from_note = glide duration, to_note = destination sustain duration
+        from_note_updated, from_duration = self._calculate_event_timing(event.from_note, start_time)
+        to_note_updated, to_duration = self._calculate_event_timing(
+            event.to_note,
+            start_time + from_duration,
+        )
+        total_duration = from_duration + to_duration
+        return replace(
+            event,
+            from_note=from_note_updated,
+            to_note=to_note_updated,
+        ), total_duration
+    
+    def _time_measure(self, event: Measure, start_time: Ticks) -> Tuple[ASTNode, Ticks]:
+        """Process all events in measure and validate duration"""
+        current_measure_time = start_time
+        updated_events: List[ASTNode] = []
+        append = updated_events.append
+        get_timing = self._timing_handlers.get
+        
+        for measure_event in event.events:
+            # Inlined _calculate_event_timing: events without a handler take no time
+            timing = get_timing(type(measure_event))
+            if timing is None:
+                append(measure_event)
+                continue
+            updated_event, duration = timing(measure_event, current_measure_time)
+            append(updated_event)
+            current_measure_time += duration
+        
+        # Grace notes report zero duration, so the total already excludes them
+        # and can be checked against the time signature as is
+        total_duration = current_measure_time - start_time
+        
+        # Validate measure duration against current time signature
+        self._validate_measure(event, total_duration)
+        
+        return replace(
+            event,
+            events=updated_events,
+            start_time=float(start_time),
+            end_time=float(current_measure_time)
+        ), total_duration
+    
+    def _time_tempo(self, event: Tempo, start_time: Ticks) -> Tuple[ASTNode, Ticks]:
+        """Tempo changes affect subsequent timing but don't consume time themselves"""
+        self.current_tempo = event.bpm
+        return event, 0
+    
+    def _time_time_signature(self, event: TimeSignature, start_time: Ticks) -> Tuple[ASTNode, Ticks]:
+        """Update the current time signature for subsequent measures (consumes no time)"""
+        self.current_time_sig = event
+        return event, 0
     
-    def _duration_to_ticks(self, duration: int, dotted: bool) -> float:
+    def _duration_to_ticks(self, duration: int, dotted: bool) -> Ticks:
         """
         Convert note duration to MIDI ticks.
         
@@ -369,18 +561,11 @@ class SemanticAnalyzer:
             dotted: Whether the note is dotted (1.5x duration)
         
         Returns:
-            Duration in MIDI ticks (float)
+            Duration in MIDI ticks (int when whole, otherwise an exact Fraction)
         """
-        # duration: 1=whole, 2=half, 4=quarter, etc.
-        # A whole note = 4 quarter notes = 4 * PPQ ticks
-        ticks = (4 * DEFAULT_MIDI_PPQ) / duration
-        
-        if dotted:
-            ticks *= DOT_MULTIPLIER
-        
-        return ticks
+        return _duration_to_ticks_cached(duration, dotted)
     
-    def _validate_measure(self, measure: Measure, total_duration_ticks: float):
+    def _validate_measure(self, measure: Measure, total_duration_ticks: Ticks):
         """
         Validate that measure duration matches the current time signature.
         
@@ -399,19 +584,13 @@ class SemanticAnalyzer:
         
         # Expected duration = (numerator / denominator) * 4 * PPQ
         # This gives us the measure length in terms of whole notes
-        beats_per_measure = self.current_time_sig.numerator
-        beat_unit = self.current_time_sig.denominator
-        
-        # Convert to ticks: (beats_per_measure / beat_unit) * 4 quarter notes * PPQ
-        expected_ticks = (beats_per_measure / beat_unit) * 4 * DEFAULT_MIDI_PPQ
+        expected_ticks = _measure_ticks(self.current_time_sig.numerator, self.current_time_sig.denominator)
         
-        # Allow small floating point tolerance
-        tolerance = 1.0
-        
-        if abs(total_duration_ticks - expected_ticks) > tolerance:
+        # Both sides are exact, so no floating point tolerance is needed
+        if total_duration_ticks != expected_ticks:
             measure_num = measure.measure_number if measure.measure_number else "unknown"
-            actual_beats = (total_duration_ticks / DEFAULT_MIDI_PPQ)
-            expected_beats = (expected_ticks / DEFAULT_MIDI_PPQ)
+            actual_beats = float(total_duration_ticks / DEFAULT_MIDI_PPQ)
+            expected_beats = float(expected_ticks / DEFAULT_MIDI_PPQ)
 
             self._error(
                 self._with_instrument_and_line(
@@ -459,227 +638,239 @@ class SemanticAnalyzer:
     
     def _track_state(self, node: ASTNode) -> ASTNode:
         """Track articulation and dynamic state with scope chain"""
-        if isinstance(node, Instrument):
-            # Build mapping of voice_num to instrument-level defaults
-            voice_defaults_map = {}
-            for voice_num, inst_defaults in node.defaults_sequence:
-                if voice_num not in voice_defaults_map:
-                    voice_defaults_map[voice_num] = inst_defaults
-            
-            # Process voice events - each voice has independent state
-            updated_voices = {}
-            for voice_num, voice_events in node.voices.items():
-                # System defaults (fallback)
-                system_defaults = {
-                    'articulation': 'natural',
-                    'dynamic_level': 'mf',
-                    'velocity': VELOCITY_MF,
-                }
-                
-                # Three-tier initialization: system < composition < instrument
-                voice_state = system_defaults.copy()
-                
-                # Initialize stacks with system defaults at base (never popped)
-                voice_state['articulation_stack'] = ['natural']
-                voice_state['dynamic_stack'] = [('mf', VELOCITY_MF)]
-                
-                # Apply composition defaults
-                if 'articulation' in self.composition_defaults:
-                    voice_state['articulation'] = self.composition_defaults['articulation']
-                    voice_state['articulation_stack'].append(self.composition_defaults['articulation'])
-                if 'dynamic_level' in self.composition_defaults:
-                    voice_state['dynamic_level'] = self.composition_defaults['dynamic_level']
-                    velocity = self._dynamic_level_to_velocity(self.composition_defaults['dynamic_level'])
-                    voice_state['velocity'] = velocity
-                    voice_state['dynamic_stack'].append((self.composition_defaults['dynamic_level'], velocity))
-                
-                # Apply instrument defaults for this voice
-                instrument_defaults = voice_defaults_map.get(voice_num, {})
-                if 'articulation' in instrument_defaults:
-                    voice_state['articulation'] = instrument_defaults['articulation']
-                    voice_state['articulation_stack'].append(instrument_defaults['articulation'])
-                if 'dynamic_level' in instrument_defaults:
-                    voice_state['dynamic_level'] = instrument_defaults['dynamic_level']
-                    velocity = self._dynamic_level_to_velocity(instrument_defaults['dynamic_level'])
-                    voice_state['velocity'] = velocity
-                    voice_state['dynamic_stack'].append((instrument_defaults['dynamic_level'], velocity))
-                
-                # Store parent defaults for reset
-                voice_state['instrument_defaults'] = instrument_defaults
-                voice_state['composition_defaults'] = self.composition_defaults
-                
-                # Initialize transition state
-                voice_state['transition_active'] = None
-                voice_state['transition_start_velocity'] = None
-                voice_state['transition_target_velocity'] = None
-                
-                updated_voice_events = []
-                for event in voice_events:
-                    updated_event = self._apply_state_to_event(event, voice_state)
-                    updated_voice_events.append(updated_event)
-                updated_voices[voice_num] = updated_voice_events
-            
-            return replace(node, voices=updated_voices)
+        return self._map_instruments(node, self._track_instrument_state)
+    
+    def _track_instrument_state(self, node: Instrument) -> Instrument:
+        """Apply state to each voice of an instrument; each voice has independent state"""
+        base_state, voice_states = self._initial_voice_states(node)
+        
+        updated_voices = {}
+        apply_state = self._apply_state_to_event
+        for voice_num, voice_events in node.voices.items():
+            voice_state = voice_states.get(voice_num, base_state).copy()
+            updated_voices[voice_num] = [
+                apply_state(event, voice_state) for event in voice_events
+            ]
+        
+        return replace(node, voices=updated_voices)
+    
+    def _calculate_timing_and_state(self, node: ASTNode) -> ASTNode:
+        """
+        Calculate timing and track state in a single traversal.
         
-        elif isinstance(node, Sequence):
-            # Handle instruments dict or events list
-            if node.instruments:
-                # Top-level sequence - process each instrument
-                updated_instruments = {}
-                for name, inst in node.instruments.items():
-                    updated_instruments[name] = self._track_state(inst)
-                return replace(node, instruments=updated_instruments)
-            else:
-                # Sub-sequence - process events
-                updated_events = []
-                for event in node.events:
-                    updated_events.append(self._track_state(event))
-                return replace(node, events=updated_events)
+        Equivalent to _calculate_timing followed by _track_state, but each
+        voice event is timed and then has its state applied before moving on,
+        so every voice is walked once instead of twice.
+        """
+        return self._map_instruments(node, self._time_and_track_instrument)
+    
+    def _time_and_track_instrument(self, node: Instrument) -> Instrument:
+        """Time each voice of an instrument from 0 and apply its state in the same walk"""
+        previous_instrument_name = self.current_instrument_name
+        self.current_instrument_name = node.name
+        base_state, voice_states = self._initial_voice_states(node)
+        time_and_track_voice = self._time_and_track_voice
+        
+        # Each voice starts at time 0 with independent state
+        updated_voices = {}
+        for voice_num, voice_events in node.voices.items():
+            voice_state = voice_states.get(voice_num, base_state).copy()
+            updated_voices[voice_num] = time_and_track_voice(voice_events, voice_state)
+        
+        self.current_instrument_name = previous_instrument_name
+        return replace(node, voices=updated_voices)
+    
+    def _time_and_track_voice(self, voice_events: List[ASTNode], voice_state: VoiceState) -> List[ASTNode]:
+        """Time one voice from 0 and apply its state, keeping loop state in locals"""
+        get_timing = self._timing_handlers.get
+        get_handler = self._state_handlers.get
+        current_time: Ticks = 0
+        updated_events: List[ASTNode] = []
+        append = updated_events.append
+        for event in voice_events:
+            # Inlined _calculate_event_timing
+            timing = get_timing(type(event))
+            if timing is not None:
+                event, duration = timing(event, current_time)
+                current_time += duration
+            # Inlined _apply_state_to_event
+            handler = get_handler(type(event))
+            append(event if handler is None else handler(event, voice_state))
+        return updated_events
+    
+    def _initial_voice_states(self, node: Instrument) -> Tuple[VoiceState, Dict[int, VoiceState]]:
+        """
+        Build the starting state templates for an instrument's voices.
         
-        return node
+        Three-tier initialization: system < composition < instrument. The
+        composition tier is applied once and the instrument tier once per
+        voice that declares defaults (first declaration wins). Callers copy a
+        template before mutating it.
+        
+        Returns:
+            (state for voices without instrument defaults, {voice_num: state})
+        """
+        base_state = VoiceState()
+        self._push_defaults(base_state, self.composition_defaults)
+        base_state.composition_defaults = self.composition_defaults
+        
+        voice_states = {}
+        for voice_num, inst_defaults in node.defaults_sequence:
+            if voice_num not in voice_states:
+                voice_state = base_state.copy()
+                self._push_defaults(voice_state, inst_defaults)
+                # Store parent defaults for reset
+                voice_state.instrument_defaults = inst_defaults
+                voice_states[voice_num] = voice_state
+        return base_state, voice_states
+    
+    def _push_defaults(self, voice_state: VoiceState, defaults: Dict[str, Any]):
+        """Push a scope's default articulation/dynamic onto the voice's stacks"""
+        if 'articulation' in defaults:
+            voice_state.articulation_stack.append(voice_state.articulation)
+            voice_state.articulation = defaults['articulation']
+        if 'dynamic_level' in defaults:
+            voice_state.dynamic_level = defaults['dynamic_level']
+            velocity = self._dynamic_level_to_velocity(defaults['dynamic_level'])
+            voice_state.velocity = velocity
+            voice_state.dynamic_stack.append(voice_state.dynamic_top)
+            voice_state.dynamic_top = (defaults['dynamic_level'], velocity)
     
-    def _apply_state_to_event(self, event: ASTNode, state: dict) -> ASTNode:
+    def _apply_state_to_event(self, event: ASTNode, state: VoiceState) -> ASTNode:
         """
         Apply current articulation and dynamic state to an event.
-        Updates state dict in place for subsequent events.
+        Updates state in place for subsequent events.
         """
-        if isinstance(event, Articulation):
-            # Update articulation state and push to stack
-            state['articulation'] = event.type
-            state['articulation_stack'].append(event.type)
-            return event
-        
-        elif isinstance(event, Reset):
-            # Stack-based reset: pop from articulation or dynamic stack
-            if event.type == 'articulation':
-                # Pop from articulation stack (undo last articulation change)
-                if len(state['articulation_stack']) > 1:
-                    state['articulation_stack'].pop()
-                # Update current articulation from top of stack
-                state['articulation'] = state['articulation_stack'][-1]
-            
-            elif event.type == 'dynamic':
-                # Pop from dynamic stack (undo last dynamic change)
-                if len(state['dynamic_stack']) > 1:
-                    state['dynamic_stack'].pop()
-                # Update current dynamic level and velocity from top of stack
-                level, velocity = state['dynamic_stack'][-1]
-                state['dynamic_level'] = level
-                state['velocity'] = velocity
-                # Clear any active transition
-                state['transition_active'] = None
-            
-            return event
-        
-        elif isinstance(event, DynamicLevel):
-            # Set new dynamic level and push to stack
-            state['dynamic_level'] = event.level
-            velocity = self._dynamic_level_to_velocity(event.level)
-            state['velocity'] = velocity
-            state['dynamic_stack'].append((event.level, velocity))
-            state['transition_active'] = None  # Clear any active transition
-            return event
-        
-        elif isinstance(event, DynamicTransition):
-            # Start crescendo or diminuendo
-            state['transition_active'] = event.type
-            state['transition_start_velocity'] = state['velocity']
-            # Target depends on direction
-            if event.type == 'crescendo':
-                state['transition_target_velocity'] = min(127, state['velocity'] + 40)
-            else:  # diminuendo
-                state['transition_target_velocity'] = max(0, state['velocity'] - 40)
-            return event
-        
-        elif isinstance(event, DynamicAccent):
-            # One-shot accent - doesn't change state
-            return event
-        
-        elif isinstance(event, Note):
-            # Apply current state to note (single or multi-pitch)
-            velocity = self._calculate_note_velocity(state, event)
-            return replace(event, 
-                         velocity=velocity,
-                         articulation=state['articulation'],
-                         dynamic_level=state['dynamic_level'])
-        
-        elif isinstance(event, PercussionNote):
-            # Apply velocity to percussion
-            velocity = self._calculate_note_velocity(state, event)
-            return replace(event, velocity=velocity)
-        
-        elif isinstance(event, Tuplet):
-            # Apply state to notes in tuplet
-            updated_notes = []
-            for note in event.notes:
-                velocity = self._calculate_note_velocity(state, note)
-                updated_note = replace(note,
-                                     velocity=velocity,
-                                     articulation=state['articulation'],
-                                     dynamic_level=state['dynamic_level'])
-                updated_notes.append(updated_note)
-            return replace(event, notes=updated_notes)
-        
-        elif isinstance(event, GraceNote):
-            # Apply state to grace note
-            velocity = self._calculate_note_velocity(state, event.note)
-            updated_note = replace(event.note,
-                                 velocity=velocity,
-                                 articulation=state['articulation'],
-                                 dynamic_level=state['dynamic_level'])
-            return replace(event, note=updated_note)
-        
-        elif isinstance(event, Slide):
-            # Apply state to both notes in slide
-            from_note_updated = self._apply_state_to_event(event.from_note, state)
-            to_note_updated = self._apply_state_to_event(event.to_note, state)
-            return replace(event, from_note=from_note_updated, to_note=to_note_updated)
-        
-        elif isinstance(event, Measure):
-            # Apply state to all events in measure
-            updated_events = []
-            for measure_event in event.events:
-                updated_event = self._apply_state_to_event(measure_event, state)
-                updated_events.append(updated_event)
-            return replace(event, events=updated_events)
-        
-        else:
-            # Other event types don't need state tracking
+        handler = self._state_handlers.get(type(event))
+        if handler is None:
+            # Other event types (e.g. one-shot accents) don't need state tracking
             return event
+        return handler(event, state)
+    
+    def _apply_articulation_state(self, event: Articulation, state: VoiceState) -> ASTNode:
+        """Save current articulation on the stack and make this the new top"""
+        state.articulation_stack.append(state.articulation)
+        state.articulation = event.type
+        return event
+    
+    def _apply_reset_state(self, event: Reset, state: VoiceState) -> ASTNode:
+        """Stack-based reset: restore the top saved beneath the current one"""
+        reset_handler = self._reset_handlers.get(event.type)
+        if reset_handler is not None:
+            reset_handler(state)
+        return event
+    
+    def _reset_articulation_state(self, state: VoiceState):
+        """Undo last articulation change"""
+        # The sentinel at index 0 is never removed, so at the system default
+        # this restores it again (no-op)
+        stack = state.articulation_stack
+        state.articulation = stack[-1]
+        del stack[max(1, len(stack) - 1):]
+    
+    def _reset_dynamic_state(self, state: VoiceState):
+        """Undo last dynamic change (same sentinel scheme as articulation)"""
+        stack = state.dynamic_stack
+        state.dynamic_top = stack[-1]
+        del stack[max(1, len(stack) - 1):]
+        # Restore dynamic level and its base velocity from the top
+        level, velocity = state.dynamic_top
+        state.dynamic_level = level
+        state.velocity = velocity
+        # Clear any active transition
+        state.transition_active = None
+    
+    def _apply_dynamic_level_state(self, event: DynamicLevel, state: VoiceState) -> ASTNode:
+        """Save current dynamic on the stack and make this the new top"""
+        state.dynamic_level = event.level
+        velocity = self._dynamic_level_to_velocity(event.level)
+        state.velocity = velocity
+        state.dynamic_stack.append(state.dynamic_top)
+        state.dynamic_top = (event.level, velocity)
+        state.transition_active = None  # Clear any active transition
+        return event
+    
+    def _apply_dynamic_transition_state(self, event: DynamicTransition, state: VoiceState) -> ASTNode:
+        """Start crescendo or diminuendo"""
+        state.transition_active = event.type
+        # Target depends on direction
+        if event.type == 'crescendo':
+            target_velocity = min(127, state.velocity + 40)
+        else:  # diminuendo
+            target_velocity = max(0, state.velocity - 40)
+        state.transition_ramp = _transition_ramp(state.velocity, target_velocity)
+        state.transition_position = 0
+        return event
+    
+    def _apply_note_state(self, event: Note, state: VoiceState) -> ASTNode:
+        """Apply current state to note (single or multi-pitch)"""
+        velocity = self._calculate_note_velocity(state, event)
+        # Built directly rather than with replace(), which re-reads the field
+        # list on every call; this is the hottest copy in state tracking
+        return Note(
+            pitches=event.pitches,
+            duration=event.duration,
+            dotted=event.dotted,
+            location=event.location,
+            start_time=event.start_time,
+            end_time=event.end_time,
+            velocity=velocity,
+            articulation=state.articulation,
+            dynamic_level=state.dynamic_level,
+        )
+    
+    def _apply_percussion_state(self, event: PercussionNote, state: VoiceState) -> ASTNode:
+        """Apply velocity to percussion"""
+        velocity = self._calculate_note_velocity(state, event)
+        return replace(event, velocity=velocity)
+    
+    def _apply_tuplet_state(self, event: Tuplet, state: VoiceState) -> ASTNode:
+        """Apply state to notes in tuplet"""
+        apply_note_state = self._apply_note_state
+        return replace(event, notes=[apply_note_state(note, state) for note in event.notes])
+    
+    def _apply_grace_note_state(self, event: GraceNote, state: VoiceState) -> ASTNode:
+        """Apply state to grace note"""
+        return replace(event, note=self._apply_note_state(event.note, state))
+    
+    def _apply_slide_state(self, event: Slide, state: VoiceState) -> ASTNode:
+        """Apply state to both notes in slide"""
+        from_note_updated = self._apply_note_state(event.from_note, state)
+        to_note_updated = self._apply_note_state(event.to_note, state)
+        return replace(event, from_note=from_note_updated, to_note=to_note_updated)
+    
+    def _apply_measure_state(self, event: Measure, state: VoiceState) -> ASTNode:
+        """Apply state to all events in measure"""
+        apply_state = self._apply_state_to_event
+        return replace(
+            event,
+            events=[apply_state(measure_event, state) for measure_event in event.events],
+        )
     
     def _dynamic_level_to_velocity(self, level: str) -> int:
         """Convert dynamic level to MIDI velocity"""
-        velocity_map = {
-            'pp': VELOCITY_PP,
-            'p': VELOCITY_P,
-            'mp': VELOCITY_MP,
-            'mf': VELOCITY_MF,
-            'f': VELOCITY_F,
-            'ff': VELOCITY_FF,
-        }
-        return velocity_map.get(level, VELOCITY_MF)
+        return VELOCITY_BY_LEVEL.get(level, VELOCITY_MF)
     
-    def _calculate_note_velocity(self, state: dict, note: ASTNode) -> int:
+    def _calculate_note_velocity(self, state: VoiceState, note: ASTNode) -> int:
         """
         Calculate MIDI velocity for a note based on current dynamic state.
         Handles crescendo/diminuendo transitions.
         """
-        velocity = state['velocity']
-        
         # Handle crescendo/diminuendo
-        if state['transition_active']:
-            # Gradually move towards target
-            target = state['transition_target_velocity']
-            if state['transition_active'] == 'crescendo':
-                velocity = min(target, velocity + DYNAMIC_TRANSITION_STEP)
-            else:  # diminuendo
-                velocity = max(target, velocity - DYNAMIC_TRANSITION_STEP)
+        if state.transition_active:
+            # Step along the precomputed ramp, holding at the target once reached.
+            # Ramp values already lie within the MIDI range
+            ramp = state.transition_ramp
+            position = state.transition_position
+            velocity = ramp[position] if position < len(ramp) else ramp[-1]
+            state.transition_position = position + 1
             
             # Update state velocity for next note
-            state['velocity'] = velocity
+            state.velocity = velocity
+            return velocity
         
         # Clamp to valid MIDI range
-        return max(0, min(127, velocity))
+        return max(0, min(127, state.velocity))
     
     def _get_children(self, node: ASTNode) -> List[ASTNode]:
         """Get child nodes for traversal"""
@@ -703,16 +894,17 @@ class SemanticAnalyzer:
             return []
     
     def _transform_children(self, node: ASTNode, transform_func) -> ASTNode:
-        """Apply transformation to children and return new node"""
+        """
+        Apply transformation to children and return new node.
+        
+        Nodes are never mutated, so when the transform hands back every child
+        unchanged the original node is returned instead of an equal copy.
+        """
         if isinstance(node, Sequence):
             if node.instruments:
                 # Top-level sequence with instruments dict
                 # Process global directives first to maintain state across instruments
-                new_events = []
-                for event in node.events:
-                    result = transform_func(event)
-                    if result is not None:
-                        new_events.append(result)
+                new_events = self._transform_event_list(node.events, transform_func, flatten=False)
                 
                 # Then process instruments (order preserved by dict in Python 3.7+)
                 # Time signatures are already injected into voice streams by parser
@@ -721,63 +913,80 @@ class SemanticAnalyzer:
                     result = transform_func(inst)
                     if result is not None:
                         new_instruments[name] = result
+                if (new_events is node.events
+                        and len(new_instruments) == len(node.instruments)
+                        and all(new_instruments[name] is inst for name, inst in node.instruments.items())):
+                    return node
                 return replace(node, instruments=new_instruments, events=new_events)
             else:
                 # Sub-sequence with events list
-                new_events = []
-                for event in node.events:
-                    result = transform_func(event)
-                    if result is not None:
-                        if isinstance(result, Sequence):
-                            # Flatten sequences
-                            new_events.extend(result.events)
-                        else:
-                            new_events.append(result)
+                new_events = self._transform_event_list(node.events, transform_func, flatten=True)
+                if new_events is node.events:
+                    return node
                 return replace(node, events=new_events)
         
         elif isinstance(node, Instrument):
             # Transform voice events only
             new_voices = {}
+            changed = False
             for voice_num, voice_events in node.voices.items():
-                new_voice_events = []
-                for event in voice_events:
-                    result = transform_func(event)
-                    if result is not None:
-                        if isinstance(result, Sequence):
-                            new_voice_events.extend(result.events)
-                        else:
-                            new_voice_events.append(result)
+                new_voice_events = self._transform_event_list(voice_events, transform_func, flatten=True)
+                changed = changed or new_voice_events is not voice_events
                 new_voices[voice_num] = new_voice_events
             
+            if not changed:
+                return node
             return replace(node, voices=new_voices)
         
         elif isinstance(node, Tuplet):
-            new_notes = [transform_func(n) for n in node.notes if transform_func(n) is not None]
+            new_notes = self._transform_event_list(node.notes, transform_func, flatten=False)
+            if new_notes is node.notes:
+                return node
             return replace(node, notes=new_notes)
         
         else:
             return node
     
+    def _transform_event_list(self, events: List[ASTNode], transform_func, flatten: bool) -> List[ASTNode]:
+        """
+        Transform each event, dropping None results and, if flatten is set,
+        splicing in the events of Sequence results.
+        
+        Returns the original list when every event comes back unchanged.
+        """
+        new_events: List[ASTNode] = []
+        append = new_events.append
+        changed = False
+        for event in events:
+            result = transform_func(event)
+            if result is None:
+                changed = True
+            elif flatten and isinstance(result, Sequence):
+                changed = True
+                new_events.extend(result.events)
+            else:
+                changed = changed or result is not event
+                append(result)
+        return new_events if changed else events
+    
     def _note_to_midi(self, note: Note) -> int:
         """Convert note to MIDI note number (uses first pitch for multi-pitch notes)"""
         if not note.pitches:
             raise ValueError("Note has no pitches")
         
-        pitch, octave, accidental = note.pitches[0]
-        pitch_map = {'c': 0, 'd': 2, 'e': 4, 'f': 5, 'g': 7, 'a': 9, 'b': 11}
-        midi_note = (octave + 1) * 12 + pitch_map[pitch]
-        
-        if accidental == 'sharp':
-            midi_note += 1
-        elif accidental == 'flat':
-            midi_note -= 1
+        return theory.pitch_to_midi(*note.pitches[0])
+    
+    def _notes_to_midi(self, notes) -> List[int]:
+        """Convert several notes to MIDI note numbers (first pitch of each)"""
+        if not all(note.pitches for note in notes):
+            raise ValueError("Note has no pitches")
         
-        return midi_note
+        return theory.pitches_to_midi([note.pitches[0] for note in notes])
     
     def _error(self, message: str):
         """Record an error"""
         self.errors.append(message)
     
-    def _warning(self, message: str):
-        """Record a warning"""
-        self.warnings.append(message)
+    def _warning(self, code: str, *args):
+        """Record a warning; the message is formatted when warnings are read"""
+        self.warning_records.append(WarningRecord(code, args))
@@ -3,6 +3,7 @@ Music Theory Support
 Handles key signatures, scales, and ornament expansion.
 """
 
+from functools import lru_cache
 from typing import List, Optional, Tuple, Dict
 from muslang.ast_nodes import Note, KeySignature
 
@@ -52,6 +53,9 @@ PITCH_TO_SEMITONE = {
     'c': 0, 'd': 2, 'e': 4, 'f': 5, 'g': 7, 'a': 9, 'b': 11
 }
 
+# Accidental to semitone offset ('natural' and None leave the pitch unchanged)
+ACCIDENTAL_TO_SEMITONE = {'sharp': 1, 'flat': -1}
+
 ALLOWED_DURATIONS = [1, 2, 4, 8, 16, 32, 64]
 UNITS_TO_DURATION: Dict[int, Tuple[int, bool]] = {}
 for _duration in ALLOWED_DURATIONS:
@@ -61,8 +65,43 @@ for _duration in ALLOWED_DURATIONS:
     UNITS_TO_DURATION[dotted_units] = (_duration, True)
 
 
+def pitch_to_midi(pitch: str, octave: int, accidental: Optional[str]) -> int:
+    """
+    Convert a pitch tuple to a MIDI note number (C4 = 60).
+
+    The result is not clamped to the 0-127 MIDI range.
+    """
+    return (
+        (octave + 1) * 12
+        + PITCH_TO_SEMITONE[pitch]
+        + ACCIDENTAL_TO_SEMITONE.get(accidental, 0)
+    )
+
+
+def pitches_to_midi(pitches) -> List[int]:
+    """
+    Convert a sequence of pitch tuples to MIDI note numbers in one pass.
+
+    Lookup tables are bound once for the whole batch; results match
+    pitch_to_midi() element for element.
+    """
+    semitones = PITCH_TO_SEMITONE
+    acc_offsets = ACCIDENTAL_TO_SEMITONE.get
+    return [
+        (octave + 1) * 12 + semitones[pitch] + acc_offsets(accidental, 0)
+        for pitch, octave, accidental in pitches
+    ]
+
+
 class KeySignatureInfo:
-    """Information about a key signature and its accidentals"""
+    """
+    Information about a key signature and its accidentals.
+    
+    Instances are immutable after construction; use get_key_signature() to
+    share one instance per (root, mode) instead of rebuilding it.
+    """
+    
+    __slots__ = ('root', 'mode', 'accidentals', '_affected', '_acc_map')
     
     def __init__(self, root: str, mode: str):
         """
@@ -75,13 +114,15 @@ class KeySignatureInfo:
         self.root = root.lower()
         self.mode = mode.lower()
         self.accidentals = self._get_accidentals()
+        self._affected = frozenset(pitch for pitch, _ in self.accidentals)
+        self._acc_map: Dict[str, str] = dict(self.accidentals)
     
-    def _get_accidentals(self) -> List[Tuple[str, str]]:
+    def _get_accidentals(self) -> Tuple[Tuple[str, str], ...]:
         """
-        Get list of accidentals for this key.
+        Get accidentals for this key.
         
         Returns:
-            List of (pitch, accidental) tuples, e.g., [('f', 'sharp'), ('c', 'sharp')]
+            Tuple of (pitch, accidental) tuples, e.g., (('f', 'sharp'), ('c', 'sharp'))
         """
         if self.mode == 'major':
             key_sig = MAJOR_KEY_SIGNATURES.get(self.root, [])
@@ -97,15 +138,11 @@ class KeySignatureInfo:
                 # String like 'f' means F sharp
                 accidentals.append((item, 'sharp'))
         
-        return accidentals
+        return tuple(accidentals)
     
     def affects_pitch(self, pitch: str) -> bool:
         """Check if key signature affects this pitch"""
-        pitch = pitch.lower()
-        for acc_pitch, _ in self.accidentals:
-            if acc_pitch == pitch:
-                return True
-        return False
+        return pitch.lower() in self._affected
     
     def get_accidental(self, pitch: str) -> Optional[str]:
         """
@@ -114,14 +151,25 @@ class KeySignatureInfo:
         Returns:
             'sharp', 'flat', or None
         """
-        pitch = pitch.lower()
-        for acc_pitch, accidental in self.accidentals:
-            if acc_pitch == pitch:
-                return accidental
-        return None
+        return self._acc_map.get(pitch.lower())
     
     def __repr__(self):
-        return f"KeySignatureInfo({self.root} {self.mode}, {self.accidentals})"
+        return f"KeySignatureInfo({self.root} {self.mode}, {list(self.accidentals)})"
+
+
+@lru_cache(maxsize=64)
+def get_key_signature(root: str, mode: str) -> KeySignatureInfo:
+    """
+    Get the shared KeySignatureInfo for a key.
+    
+    Args:
+        root: Root note (e.g., 'c', 'd', 'f', 'b-')
+        mode: 'major' or 'minor'
+    
+    Returns:
+        Cached KeySignatureInfo instance for (root, mode)
+    """
+    return KeySignatureInfo(root, mode)
 
 
 def get_upper_neighbor(note: Note, key_sig: Optional[KeySignatureInfo] = None) -> Note:
@@ -259,7 +307,7 @@ def _build_note(base_note: Note, pitch: str, octave: int, accidental: Optional[s
         raise ValueError(f"Cannot represent note duration units={units}")
     duration, dotted = duration_info
     return Note(
-        pitches=[(pitch, octave, accidental)],
+        pitches=((pitch, octave, accidental),),
         duration=duration,
         dotted=dotted,
     )
@@ -293,23 +341,26 @@ def _expand_trill(note: Note, upper: Note, total_units: int) -> List[Note]:
 
     count = total_units // segment_units
     remainder = total_units % segment_units
-    notes: List[Note] = []
     
     note_pitch, note_octave, note_accidental = note.pitches[0] if note.pitches else ('c', 4, None)
-    upper_pitch, upper_octave, upper_accidental = upper.pitches[0] if upper.pitches else ('c', 4, None)
+    principal = (note_pitch, note_octave, note_accidental)
+    upper_pitch = upper.pitches[0] if upper.pitches else ('c', 4, None)
 
-    for i in range(count):
-        if i % 2 == 0:
-            notes.append(_build_note(note, note_pitch, note_octave, note_accidental, segment_units))
-        else:
-            notes.append(_build_note(note, upper_pitch, upper_octave, upper_accidental, segment_units))
+    if remainder > 0 and _units_to_duration(remainder) is None:
+        return _principal_from_units(note, total_units)
+
+    # Segment length is fixed, so resolve it once and alternate the two pitches
+    duration, dotted = UNITS_TO_DURATION[segment_units]
+    alternation = ((principal,), (upper_pitch,))
+    notes: List[Note] = [
+        Note(pitches=alternation[i & 1], duration=duration, dotted=dotted)
+        for i in range(count)
+    ]
 
     if remainder > 0:
-        if _units_to_duration(remainder) is None:
-            return _principal_from_units(note, total_units)
         notes.append(_build_note(note, note_pitch, note_octave, note_accidental, remainder))
 
-    return notes if notes else _principal_from_units(note, total_units)
+    return notes
 
 
 def _expand_mordent(note: Note, lower: Note, total_units: int) -> List[Note]:
@@ -365,20 +416,24 @@ def _expand_tremolo(note: Note, total_units: int) -> List[Note]:
         return _principal_from_units(note, total_units)
     
     note_pitch, note_octave, note_accidental = note.pitches[0] if note.pitches else ('c', 4, None)
+    principal = (note_pitch, note_octave, note_accidental)
 
     count = total_units // segment_units
     remainder = total_units % segment_units
-    notes = [
-        _build_note(note, note_pitch, note_octave, note_accidental, segment_units)
+    if remainder > 0 and _units_to_duration(remainder) is None:
+        return _principal_from_units(note, total_units)
+
+    duration, dotted = UNITS_TO_DURATION[segment_units]
+    pitches = (principal,)
+    notes: List[Note] = [
+        Note(pitches=pitches, duration=duration, dotted=dotted)
         for _ in range(count)
     ]
 
     if remainder > 0:
-        if _units_to_duration(remainder) is None:
-            return _principal_from_units(note, total_units)
         notes.append(_build_note(note, note_pitch, note_octave, note_accidental, remainder))
 
-    return notes if notes else _principal_from_units(note, total_units)
+    return notes
 
 
 def apply_key_signature_to_note(note: Note, key_sig: KeySignatureInfo) -> Note:
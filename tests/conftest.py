@@ -0,0 +1,44 @@
+"""
+Shared pytest fixtures for the Muslang test suite.
+
+The preferred pytest-xdist mode is ``--dist=loadfile``: each test module runs
+on a single worker, so module-scoped fixtures are built once per file. Each
+worker is its own session, so the session-scoped fixtures below are rebuilt
+per worker; none of them carries state from one test to the next.
+"""
+
+import pytest
+from muslang.midi_gen import MIDIGenerator
+from muslang.semantics import SemanticAnalyzer
+from muslang.theory import get_key_signature
+
+
+@pytest.fixture(scope="session")
+def _shared_analyzer():
+    """Single SemanticAnalyzer instance reused across the session"""
+    return SemanticAnalyzer()
+
+
+@pytest.fixture
+def analyzer(_shared_analyzer):
+    """SemanticAnalyzer with state cleared for the current test"""
+    _shared_analyzer.reset()
+    return _shared_analyzer
+
+
+@pytest.fixture(scope="session")
+def midi_generator():
+    """Single MIDIGenerator reused across the session (each build starts fresh)"""
+    return MIDIGenerator()
+
+
+@pytest.fixture(scope="session")
+def g_major():
+    """G major key signature (F#), shared across the session"""
+    return get_key_signature('g', 'major')
+
+
+@pytest.fixture(scope="session")
+def f_major():
+    """F major key signature (Bb), shared across the session"""
+    return get_key_signature('f', 'major')
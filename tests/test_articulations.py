@@ -1,8 +1,10 @@
 """
 Tests for articulation parsing including the new :natural articulation.
 """
+import sys
+
 from muslang.parser import parse_muslang
-from muslang.ast_nodes import Articulation
+from muslang.ast_nodes import Articulation, DynamicLevel, DynamicTransition
 
 
 def test_natural_articulation_parsing():
@@ -19,3 +21,14 @@ def test_natural_articulation_parsing():
     assert len(events) >= 1
     assert isinstance(events[0], Articulation)
     assert events[0].type == 'natural'
+
+
+def test_articulation_and_dynamic_strings_are_interned():
+    articulation = Articulation(type=''.join(['stac', 'cato']))
+    dynamic = DynamicLevel(level=''.join(['m', 'f']))
+    transition = DynamicTransition(type=''.join(['cresc', 'endo']), target_level=''.join(['f', 'f']))
+
+    assert articulation.type is sys.intern('staccato')
+    assert dynamic.level is sys.intern('mf')
+    assert transition.type is sys.intern('crescendo')
+    assert transition.target_level is sys.intern('ff')
@@ -11,8 +11,8 @@ Tests cover:
 - MIDI file output verification
 """
 
+import io
 import pytest
-import tempfile
 import os
 from muslang.midi_gen import MIDIGenerator, INSTRUMENT_MAP
 from muslang.ast_nodes import *
@@ -158,6 +158,8 @@ class TestChannelAssignment:
 class TestBasicMIDIGeneration:
     """Test basic MIDI file generation"""
     
+    pytestmark = pytest.mark.midi
+    
     def test_single_note(self):
         """Generate MIDI with single note"""
         # Create AST
@@ -167,26 +169,20 @@ class TestBasicMIDIGeneration:
         
         # Generate MIDI
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify MIDI file
-            midi = mido.MidiFile(temp_path)
-            # midiutil creates track 0 for tempo, instrument tracks start at 1
-            assert len(midi.tracks) >= 1
-            
-            # Find note events in track 1 (first instrument track)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            note_offs = [m for m in messages if m.type == 'note_on' and m.velocity == 0 or m.type == 'note_off']
-            
-            assert len(note_ons) >= 1
-            assert note_ons[0].note == 60  # C4
-        finally:
-            os.unlink(temp_path)
+        # Verify MIDI file
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        # midiutil creates track 0 for tempo, instrument tracks start at 1
+        assert len(midi.tracks) >= 1
+        
+        # Find note events in track 1 (first instrument track)
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        note_offs = [m for m in messages if m.type == 'note_on' and m.velocity == 0 or m.type == 'note_off']
+        
+        assert len(note_ons) >= 1
+        assert note_ons[0].note == 60  # C4
     
     def test_melody(self):
         """Generate MIDI with simple melody"""
@@ -201,24 +197,18 @@ class TestBasicMIDIGeneration:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify MIDI file
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            assert len(note_ons) >= 4
-            assert note_ons[0].note == 60  # C4
-            assert note_ons[1].note == 62  # D4
-            assert note_ons[2].note == 64  # E4
-            assert note_ons[3].note == 65  # F4
-        finally:
-            os.unlink(temp_path)
+        # Verify MIDI file
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        
+        assert len(note_ons) >= 4
+        assert note_ons[0].note == 60  # C4
+        assert note_ons[1].note == 62  # D4
+        assert note_ons[2].note == 64  # E4
+        assert note_ons[3].note == 65  # F4
     
     def test_rest(self):
         """Test rest handling"""
@@ -231,27 +221,21 @@ class TestBasicMIDIGeneration:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify MIDI file
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # Should have 2 notes
-            assert len(note_ons) == 2
-            
-            # Second note should start after rest
-            elapsed_time = sum(m.time for m in messages[:messages.index(note_ons[1]) + 1])
-            # midiutil doubles PPQ internally, so expected time is 2 * 2 * 480 = 1920
-            expected_time = 2 * 2 * 480  # 2 quarter notes * 2 (midiutil scaling) * 480
-            assert abs(elapsed_time - expected_time) < 10  # Allow small rounding error
-        finally:
-            os.unlink(temp_path)
+        # Verify MIDI file
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        
+        # Should have 2 notes
+        assert len(note_ons) == 2
+        
+        # Second note should start after rest
+        elapsed_time = sum(m.time for m in messages[:messages.index(note_ons[1]) + 1])
+        # midiutil doubles PPQ internally, so expected time is 2 * 2 * 480 = 1920
+        expected_time = 2 * 2 * 480  # 2 quarter notes * 2 (midiutil scaling) * 480
+        assert abs(elapsed_time - expected_time) < 10  # Allow small rounding error
     
     def test_chord(self):
         """Test chord generation"""
@@ -261,41 +245,37 @@ class TestBasicMIDIGeneration:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify MIDI file
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # Should have 3 simultaneous notes
-            assert len(note_ons) == 3
-            assert note_ons[0].note == 60  # C4
-            assert note_ons[1].note == 64  # E4
-            assert note_ons[2].note == 67  # G4
-            
-            # All notes should start at same time
-            times = []
-            cumulative = 0
-            for m in messages:
-                if m.type == 'note_on' and m.velocity > 0:
-                    times.append(cumulative)
-                cumulative += m.time
-            
-            assert times[0] == times[1] == times[2]
-        finally:
-            os.unlink(temp_path)
+        # Verify MIDI file
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        
+        # Should have 3 simultaneous notes
+        assert len(note_ons) == 3
+        assert note_ons[0].note == 60  # C4
+        assert note_ons[1].note == 64  # E4
+        assert note_ons[2].note == 67  # G4
+        
+        # All notes should start at same time
+        times = []
+        cumulative = 0
+        for m in messages:
+            if m.type == 'note_on' and m.velocity > 0:
+                times.append(cumulative)
+            cumulative += m.time
+        
+        assert times[0] == times[1] == times[2]
 
 
 class TestArticulationMapping:
     """Test articulation and dynamic mapping to MIDI"""
+    
+    pytestmark = pytest.mark.midi
 
-    def _first_note_duration_ticks(self, midi_path: str) -> int:
-        midi = mido.MidiFile(midi_path)
+    def _first_note_duration_ticks(self, midi_data: bytes) -> int:
+        midi = mido.MidiFile(file=io.BytesIO(midi_data))
         track = midi.tracks[1] if len(midi.tracks) > 1 else midi.tracks[0]
 
         abs_time = 0
@@ -341,26 +321,14 @@ class TestArticulationMapping:
         legato_ast = analyzer.analyze(legato_ast)
 
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f1, \
-             tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f2:
-            staccato_path = f1.name
-            legato_path = f2.name
-
-        try:
-            gen.generate(staccato_ast, staccato_path)
-            gen.generate(legato_ast, legato_path)
+        staccato_ticks = self._first_note_duration_ticks(gen.generate_to_buffer(staccato_ast))
+        legato_ticks = self._first_note_duration_ticks(gen.generate_to_buffer(legato_ast))
 
-            staccato_ticks = self._first_note_duration_ticks(staccato_path)
-            legato_ticks = self._first_note_duration_ticks(legato_path)
+        assert staccato_ticks < legato_ticks
 
-            assert staccato_ticks < legato_ticks
-
-            ratio = staccato_ticks / legato_ticks
-            expected_ratio = STACCATO_DURATION / LEGATO_DURATION
-            assert abs(ratio - expected_ratio) < 0.1
-        finally:
-            os.unlink(staccato_path)
-            os.unlink(legato_path)
+        ratio = staccato_ticks / legato_ticks
+        expected_ratio = STACCATO_DURATION / LEGATO_DURATION
+        assert abs(ratio - expected_ratio) < 0.1
     
     def test_staccato_duration(self):
         """Staccato should shorten note duration"""
@@ -372,32 +340,26 @@ class TestArticulationMapping:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify note duration is shorter
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            note_offs = [m for m in messages if m.type == 'note_on' and m.velocity == 0 or m.type == 'note_off']
-            
-            assert len(note_ons) == 1
-            
-            # Calculate actual duration
-            on_time = sum(m.time for m in messages[:messages.index(note_ons[0]) + 1])
-            off_idx = next(i for i, m in enumerate(messages) if (m.type == 'note_off' or (m.type == 'note_on' and m.velocity == 0)) and m.note == 60)
-            off_time = sum(m.time for m in messages[:off_idx + 1])
-            
-            duration_ticks = off_time - on_time
-            # Just verify staccato makes the note shorter than full duration
-            # midiutil's internal timing is complex, but we can verify relative behavior
-            full_duration = 2 * 480  # Full quarter note in midiutil's doubled PPQ
-            assert duration_ticks < full_duration  # Staccato should be shorter than full
-        finally:
-            os.unlink(temp_path)
+        # Verify note duration is shorter
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        note_offs = [m for m in messages if m.type == 'note_on' and m.velocity == 0 or m.type == 'note_off']
+        
+        assert len(note_ons) == 1
+        
+        # Calculate actual duration
+        on_time = sum(m.time for m in messages[:messages.index(note_ons[0]) + 1])
+        off_idx = next(i for i, m in enumerate(messages) if (m.type == 'note_off' or (m.type == 'note_on' and m.velocity == 0)) and m.note == 60)
+        off_time = sum(m.time for m in messages[:off_idx + 1])
+        
+        duration_ticks = off_time - on_time
+        # Just verify staccato makes the note shorter than full duration
+        # midiutil's internal timing is complex, but we can verify relative behavior
+        full_duration = 2 * 480  # Full quarter note in midiutil's doubled PPQ
+        assert duration_ticks < full_duration  # Staccato should be shorter than full
     
     def test_dynamic_level_velocity(self):
         """Dynamic level should affect velocity"""
@@ -416,30 +378,26 @@ class TestArticulationMapping:
         ast = analyzer.analyze(ast)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify velocities
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            assert len(note_ons) == 2
-            
-            # Piano velocity should be less than forte
-            assert note_ons[0].velocity == VELOCITY_P
-            assert note_ons[1].velocity == VELOCITY_F
-            assert note_ons[0].velocity < note_ons[1].velocity
-        finally:
-            os.unlink(temp_path)
+        # Verify velocities
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        
+        assert len(note_ons) == 2
+        
+        # Piano velocity should be less than forte
+        assert note_ons[0].velocity == VELOCITY_P
+        assert note_ons[1].velocity == VELOCITY_F
+        assert note_ons[0].velocity < note_ons[1].velocity
 
 
 class TestAdvancedFeatures:
     """Test advanced MIDI generation features"""
     
+    pytestmark = pytest.mark.midi
+    
     def test_legato_articulation_note_generation(self):
         """Test legato articulation still generates notes correctly"""
         events = [
@@ -452,24 +410,20 @@ class TestAdvancedFeatures:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify notes are present
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        # Verify notes are present
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
 
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            assert len(note_ons) == 3
-        finally:
-            os.unlink(temp_path)
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        assert len(note_ons) == 3
 
 
 class TestOrnamentMIDI:
     """Test ornament expansion yields audible MIDI note events"""
+    
+    pytestmark = pytest.mark.midi
 
     @pytest.mark.parametrize(
         "marker,expected_count",
@@ -490,18 +444,12 @@ class TestOrnamentMIDI:
         analyzed = SemanticAnalyzer().analyze(parse_muslang(source))
         gen = MIDIGenerator(ppq=480)
 
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
-
-        try:
-            gen.generate(analyzed, temp_path)
+        data = gen.generate_to_buffer(analyzed)
 
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            assert len(note_ons) == expected_count
-        finally:
-            os.unlink(temp_path)
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        assert len(note_ons) == expected_count
     
     def test_percussion(self):
         """Test percussion note generation"""
@@ -510,22 +458,16 @@ class TestOrnamentMIDI:
         ast = Sequence(instruments={'drums': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify drum note is on channel 9
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            assert len(note_ons) == 1
-            assert note_ons[0].channel == GM_DRUM_CHANNEL
-            assert note_ons[0].note == 36  # Kick drum
-        finally:
-            os.unlink(temp_path)
+        # Verify drum note is on channel 9
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        
+        assert len(note_ons) == 1
+        assert note_ons[0].channel == GM_DRUM_CHANNEL
+        assert note_ons[0].note == 36  # Kick drum
     
     def test_tempo_change(self):
         """Test tempo meta-event"""
@@ -537,21 +479,15 @@ class TestOrnamentMIDI:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify tempo event
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[0])
-            tempo_msgs = [m for m in messages if m.type == 'set_tempo']
-            
-            # Should have at least one tempo message
-            assert len(tempo_msgs) >= 1
-        finally:
-            os.unlink(temp_path)
+        # Verify tempo event
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[0])
+        tempo_msgs = [m for m in messages if m.type == 'set_tempo']
+        
+        # Should have at least one tempo message
+        assert len(tempo_msgs) >= 1
     
     def test_time_signature(self):
         """Test time signature meta-event"""
@@ -563,27 +499,21 @@ class TestOrnamentMIDI:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify time signature event
-            midi = mido.MidiFile(temp_path)
-            # Time signature is in the instrument track (track 1)
-            all_messages = []
-            for track in midi.tracks:
-                all_messages.extend(list(track))
-            time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
-            
-            assert len(time_sig_msgs) >= 1
-            assert time_sig_msgs[0].numerator == 3
-            # midiutil uses power-of-2 encoding: 4 = 2^2, stored as 2
-            # But mido decodes it back to the actual value when reading
-            assert time_sig_msgs[0].denominator == 4
-        finally:
-            os.unlink(temp_path)
+        # Verify time signature event
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        # Time signature is in the instrument track (track 1)
+        all_messages = []
+        for track in midi.tracks:
+            all_messages.extend(list(track))
+        time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
+        
+        assert len(time_sig_msgs) >= 1
+        assert time_sig_msgs[0].numerator == 3
+        # midiutil uses power-of-2 encoding: 4 = 2^2, stored as 2
+        # But mido decodes it back to the actual value when reading
+        assert time_sig_msgs[0].denominator == 4
     
     def test_pan(self):
         """Test pan CC event"""
@@ -595,25 +525,21 @@ class TestOrnamentMIDI:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify pan CC
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            pan_msgs = [m for m in messages if m.type == 'control_change' and m.control == CC_PAN]
-            
-            assert len(pan_msgs) >= 1
-            assert pan_msgs[0].value == 64
-        finally:
-            os.unlink(temp_path)
+        # Verify pan CC
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        pan_msgs = [m for m in messages if m.type == 'control_change' and m.control == CC_PAN]
+        
+        assert len(pan_msgs) >= 1
+        assert pan_msgs[0].value == 64
 
 
 class TestMultiInstrument:
     """Test multi-instrument MIDI generation"""
+    
+    pytestmark = pytest.mark.midi
 
     def test_multiple_voices_use_distinct_channels(self):
         """Voices in the same instrument should use separate channels."""
@@ -626,21 +552,15 @@ class TestMultiInstrument:
         analyzed = SemanticAnalyzer().analyze(parse_muslang(source))
 
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(analyzed)
 
-        try:
-            gen.generate(analyzed, temp_path)
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
 
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-
-            assert len(note_ons) == 2
-            channels = {m.channel for m in note_ons}
-            assert len(channels) == 2
-        finally:
-            os.unlink(temp_path)
+        assert len(note_ons) == 2
+        channels = {m.channel for m in note_ons}
+        assert len(channels) == 2
     
     def test_two_instruments(self):
         """Generate MIDI with two instruments"""
@@ -653,25 +573,19 @@ class TestMultiInstrument:
         ast = Sequence(instruments={'piano': piano, 'violin': violin})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify tracks (track 0 is tempo, tracks 1-2 are instruments)
-            midi = mido.MidiFile(temp_path)
-            assert len(midi.tracks) >= 2  # At least 2 tracks (tempo + instruments)
+        # Verify tracks (track 0 is tempo, tracks 1-2 are instruments)
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        assert len(midi.tracks) >= 2  # At least 2 tracks (tempo + instruments)
+        
+        # Verify different channels
+        if len(midi.tracks) > 2:
+            track1_msgs = [m for m in midi.tracks[1] if hasattr(m, 'channel')]
+            track2_msgs = [m for m in midi.tracks[2] if hasattr(m, 'channel')]
             
-            # Verify different channels
-            if len(midi.tracks) > 2:
-                track1_msgs = [m for m in midi.tracks[1] if hasattr(m, 'channel')]
-                track2_msgs = [m for m in midi.tracks[2] if hasattr(m, 'channel')]
-                
-                if track1_msgs and track2_msgs:
-                    assert track1_msgs[0].channel != track2_msgs[0].channel
-        finally:
-            os.unlink(temp_path)
+            if track1_msgs and track2_msgs:
+                assert track1_msgs[0].channel != track2_msgs[0].channel
     
     def test_instrument_program_change(self):
         """Test that different instruments get correct program changes"""
@@ -679,26 +593,22 @@ class TestMultiInstrument:
         ast = Sequence(instruments={'violin': violin})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify program change for violin
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            program_msgs = [m for m in messages if m.type == 'program_change']
-            
-            assert len(program_msgs) >= 1
-            assert program_msgs[0].program == INSTRUMENT_MAP['violin']
-        finally:
-            os.unlink(temp_path)
+        # Verify program change for violin
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        program_msgs = [m for m in messages if m.type == 'program_change']
+        
+        assert len(program_msgs) >= 1
+        assert program_msgs[0].program == INSTRUMENT_MAP['violin']
 
 
 class TestSlideGeneration:
     """Test slide/glissando generation"""
     
+    pytestmark = pytest.mark.midi
+    
     def test_chromatic_slide(self):
         """Test chromatic slide with pitch bend"""
         from_note = Note(pitches=[('c', 4, None)], duration=4)
@@ -708,24 +618,18 @@ class TestSlideGeneration:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify pitch bend events
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
-            
-            # Should have multiple pitch bend events for smooth slide
-            assert len(pitch_bend_msgs) > 1
-            
-            # Should reset pitch bend at end to 0 (midiutil uses signed format)
-            assert pitch_bend_msgs[-1].pitch == 0
-        finally:
-            os.unlink(temp_path)
+        # Verify pitch bend events
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
+        
+        # Should have multiple pitch bend events for smooth slide
+        assert len(pitch_bend_msgs) > 1
+        
+        # Should reset pitch bend at end to 0 (midiutil uses signed format)
+        assert pitch_bend_msgs[-1].pitch == 0
     
     def test_stepped_slide(self):
         """Test stepped slide with chromatic notes"""
@@ -736,21 +640,15 @@ class TestSlideGeneration:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify multiple chromatic notes
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # C to E is 4 semitones, should have 5 notes (C, C#, D, D#, E)
-            assert len(note_ons) >= 4
-        finally:
-            os.unlink(temp_path)
+        # Verify multiple chromatic notes
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        
+        # C to E is 4 semitones, should have 5 notes (C, C#, D, D#, E)
+        assert len(note_ons) >= 4
     
     def test_portamento_slide(self):
         """Test portamento slide with CC"""
@@ -761,40 +659,66 @@ class TestSlideGeneration:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify portamento CC events
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            portamento_msgs = [m for m in messages if m.type == 'control_change' and m.control in [CC_PORTAMENTO_TIME, CC_PORTAMENTO_SWITCH]]
-            
-            # Should have portamento on and off
-            assert len(portamento_msgs) >= 2
-        finally:
-            os.unlink(temp_path)
+        # Verify portamento CC events
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        portamento_msgs = [m for m in messages if m.type == 'control_change' and m.control in [CC_PORTAMENTO_TIME, CC_PORTAMENTO_SWITCH]]
+        
+        # Should have portamento on and off
+        assert len(portamento_msgs) >= 2
+
+
+class TestBufferOutput:
+    """Test in-memory MIDI generation"""
+    
+    pytestmark = pytest.mark.midi
+    
+    def test_generate_to_buffer_matches_file(self, tmp_path):
+        """generate_to_buffer should return the same bytes generate writes"""
+        note = Note(pitches=[('c', 4, None)], duration=4)
+        instrument = Instrument(name='piano', events=[], voices={1: [note]})
+        ast = Sequence(instruments={'piano': instrument})
+        
+        data = MIDIGenerator(ppq=480).generate_to_buffer(ast)
+        assert data[:4] == b'MThd'
+        
+        path = tmp_path / 'out.mid'
+        MIDIGenerator(ppq=480).generate(ast, str(path))
+        assert path.read_bytes() == data
+    
+    def test_reused_generator_gives_identical_output(self):
+        """Channel assignment should restart for each composition"""
+        voices = {n: [Note(pitches=[('c', 4, None)], duration=4)] for n in range(1, 9)}
+        ast = Sequence(instruments={'piano': Instrument(name='piano', events=[], voices=voices)})
+        
+        gen = MIDIGenerator(ppq=480)
+        first = gen.generate_to_buffer(ast)
+        # Eight channels per build would run past channel 15 on the third build
+        assert gen.generate_to_buffer(ast) == first
+        assert gen.generate_to_buffer(ast) == first
+    
+    def test_generate_to_buffer_empty_composition(self):
+        """Empty composition should raise error without producing output"""
+        gen = MIDIGenerator(ppq=480)
+        with pytest.raises(ValueError, match="No instruments"):
+            gen.generate_to_buffer(Sequence(instruments={}))
 
 
 class TestEdgeCases:
     """Test edge cases and error handling"""
     
+    pytestmark = pytest.mark.midi
+    
     def test_empty_composition(self):
         """Empty composition should raise error"""
         ast = Sequence(instruments={})
         gen = MIDIGenerator(ppq=480)
         
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
-        
-        try:
-            with pytest.raises(ValueError, match="No instruments"):
-                gen.generate(ast, temp_path)
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        # The error is raised before the output file is opened
+        with pytest.raises(ValueError, match="No instruments"):
+            gen.generate(ast, os.devnull)
     
     def test_very_high_note(self):
         """Very high notes should be clamped"""
@@ -819,20 +743,14 @@ class TestEdgeCases:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Should generate note successfully
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            assert len(note_ons) >= 1
-        finally:
-            os.unlink(temp_path)
+        # Should generate note successfully
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
+        note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
+        
+        assert len(note_ons) >= 1
 
     def test_unexpanded_ornament_raises_error(self):
         """MIDI generation should fail fast for unexpanded ornament nodes"""
@@ -844,20 +762,15 @@ class TestEdgeCases:
         ast = Sequence(instruments={'piano': instrument})
 
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
-
-        try:
-            with pytest.raises(ValueError, match="Unexpanded ornament"):
-                gen.generate(ast, temp_path)
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        with pytest.raises(ValueError, match="Unexpanded ornament"):
+            gen.generate_to_buffer(ast)
 
 
 class TestMetaEventChanges:
     """Tests for multiple tempo, time signature, and key signature changes in MIDI output"""
     
+    pytestmark = pytest.mark.midi
+    
     def test_multiple_time_signature_changes(self):
         """Test multiple time signature changes are written to MIDI"""
         events = [
@@ -872,34 +785,28 @@ class TestMetaEventChanges:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify multiple time signature events
-            midi = mido.MidiFile(temp_path)
-            all_messages = []
-            for track in midi.tracks:
-                all_messages.extend(list(track))
-            
-            time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
-            
-            # Should have 3 time signature events
-            assert len(time_sig_msgs) >= 3
-            
-            # Verify the values
-            assert time_sig_msgs[0].numerator == 4
-            assert time_sig_msgs[0].denominator == 4
-            
-            assert time_sig_msgs[1].numerator == 3
-            assert time_sig_msgs[1].denominator == 4
-            
-            assert time_sig_msgs[2].numerator == 5
-            assert time_sig_msgs[2].denominator == 4
-        finally:
-            os.unlink(temp_path)
+        # Verify multiple time signature events
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        all_messages = []
+        for track in midi.tracks:
+            all_messages.extend(list(track))
+        
+        time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
+        
+        # Should have 3 time signature events
+        assert len(time_sig_msgs) >= 3
+        
+        # Verify the values
+        assert time_sig_msgs[0].numerator == 4
+        assert time_sig_msgs[0].denominator == 4
+        
+        assert time_sig_msgs[1].numerator == 3
+        assert time_sig_msgs[1].denominator == 4
+        
+        assert time_sig_msgs[2].numerator == 5
+        assert time_sig_msgs[2].denominator == 4
     
     def test_multiple_tempo_changes(self):
         """Test multiple tempo changes are written to MIDI"""
@@ -915,33 +822,27 @@ class TestMetaEventChanges:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify multiple tempo events
-            midi = mido.MidiFile(temp_path)
-            all_messages = []
-            for track in midi.tracks:
-                all_messages.extend(list(track))
-            
-            tempo_msgs = [m for m in all_messages if m.type == 'set_tempo']
-            
-            # Should have at least 3 tempo events (plus potentially default)
-            assert len(tempo_msgs) >= 3
-            
-            # Verify tempo values (mido stores tempo in microseconds per beat)
-            # 120 BPM = 500000 microseconds per beat
-            # 60 BPM = 1000000 microseconds per beat
-            # 180 BPM = 333333 microseconds per beat
-            bpm_to_tempo = lambda bpm: int(60000000 / bpm)
-            assert any(abs(m.tempo - bpm_to_tempo(120)) < 100 for m in tempo_msgs)
-            assert any(abs(m.tempo - bpm_to_tempo(60)) < 100 for m in tempo_msgs)
-            assert any(abs(m.tempo - bpm_to_tempo(180)) < 100 for m in tempo_msgs)
-        finally:
-            os.unlink(temp_path)
+        # Verify multiple tempo events
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        all_messages = []
+        for track in midi.tracks:
+            all_messages.extend(list(track))
+        
+        tempo_msgs = [m for m in all_messages if m.type == 'set_tempo']
+        
+        # Should have at least 3 tempo events (plus potentially default)
+        assert len(tempo_msgs) >= 3
+        
+        # Verify tempo values (mido stores tempo in microseconds per beat)
+        # 120 BPM = 500000 microseconds per beat
+        # 60 BPM = 1000000 microseconds per beat
+        # 180 BPM = 333333 microseconds per beat
+        bpm_to_tempo = lambda bpm: int(60000000 / bpm)
+        assert any(abs(m.tempo - bpm_to_tempo(120)) < 100 for m in tempo_msgs)
+        assert any(abs(m.tempo - bpm_to_tempo(60)) < 100 for m in tempo_msgs)
+        assert any(abs(m.tempo - bpm_to_tempo(180)) < 100 for m in tempo_msgs)
     
     def test_time_signature_changes_timing(self):
         """Test that time signature changes occur at the correct times"""
@@ -956,32 +857,26 @@ class TestMetaEventChanges:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            all_messages = []
-            for track in midi.tracks:
-                all_messages.extend(list(track))
-            
-            time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
-            
-            # First time signature should be at time 0
-            assert time_sig_msgs[0].time == 0 or sum(m.time for m in all_messages[:all_messages.index(time_sig_msgs[0])+1]) == 0
-            
-            # Second time signature should be after 2 quarter notes (2 * 480 = 960 ticks)
-            # Calculate absolute time for second time signature
-            second_ts_idx = all_messages.index(time_sig_msgs[1])
-            abs_time_second_ts = sum(m.time for m in all_messages[:second_ts_idx+1])
-            
-            # Should be approximately after 2 beats
-            # Note: The actual timing might vary based on when meta-events are placed
-            assert abs_time_second_ts >= 960
-        finally:
-            os.unlink(temp_path)
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        all_messages = []
+        for track in midi.tracks:
+            all_messages.extend(list(track))
+        
+        time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
+        
+        # First time signature should be at time 0
+        assert time_sig_msgs[0].time == 0 or sum(m.time for m in all_messages[:all_messages.index(time_sig_msgs[0])+1]) == 0
+        
+        # Second time signature should be after 2 quarter notes (2 * 480 = 960 ticks)
+        # Calculate absolute time for second time signature
+        second_ts_idx = all_messages.index(time_sig_msgs[1])
+        abs_time_second_ts = sum(m.time for m in all_messages[:second_ts_idx+1])
+        
+        # Should be approximately after 2 beats
+        # Note: The actual timing might vary based on when meta-events are placed
+        assert abs_time_second_ts >= 960
     
     def test_tempo_changes_timing(self):
         """Test that tempo changes occur at the correct times"""
@@ -995,36 +890,30 @@ class TestMetaEventChanges:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            all_messages = []
-            for track in midi.tracks:
-                all_messages.extend(list(track))
-            
-            tempo_msgs = [m for m in all_messages if m.type == 'set_tempo']
-            
-            # Should have at least 2 tempo events
-            assert len(tempo_msgs) >= 2
-            
-            # First tempo should be at time 0
-            first_tempo_idx = all_messages.index(tempo_msgs[0])
-            abs_time_first = sum(m.time for m in all_messages[:first_tempo_idx+1])
-            assert abs_time_first == 0
-            
-            # Second tempo should be after 1 quarter note
-            if len(tempo_msgs) > 1:
-                second_tempo_idx = all_messages.index(tempo_msgs[1])
-                abs_time_second = sum(m.time for m in all_messages[:second_tempo_idx+1])
-                # Should be approximately after 1 beat
-                # Note: The actual timing might vary based on when meta-events are placed
-                assert abs_time_second >= 480
-        finally:
-            os.unlink(temp_path)
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        all_messages = []
+        for track in midi.tracks:
+            all_messages.extend(list(track))
+        
+        tempo_msgs = [m for m in all_messages if m.type == 'set_tempo']
+        
+        # Should have at least 2 tempo events
+        assert len(tempo_msgs) >= 2
+        
+        # First tempo should be at time 0
+        first_tempo_idx = all_messages.index(tempo_msgs[0])
+        abs_time_first = sum(m.time for m in all_messages[:first_tempo_idx+1])
+        assert abs_time_first == 0
+        
+        # Second tempo should be after 1 quarter note
+        if len(tempo_msgs) > 1:
+            second_tempo_idx = all_messages.index(tempo_msgs[1])
+            abs_time_second = sum(m.time for m in all_messages[:second_tempo_idx+1])
+            # Should be approximately after 1 beat
+            # Note: The actual timing might vary based on when meta-events are placed
+            assert abs_time_second >= 480
     
     def test_combined_meta_event_changes(self):
         """Test combinations of tempo and time signature changes"""
@@ -1060,28 +949,22 @@ class TestMetaEventChanges:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Verify file is valid and contains both types of events
-            midi = mido.MidiFile(temp_path)
-            all_messages = []
-            for track in midi.tracks:
-                all_messages.extend(list(track))
-            
-            tempo_msgs = [m for m in all_messages if m.type == 'set_tempo']
-            time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
-            note_ons = [m for m in all_messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # Should have tempo changes, time signature changes, and notes
-            assert len(tempo_msgs) >= 2
-            assert len(time_sig_msgs) >= 2
-            assert len(note_ons) == 7  # 4 notes + 3 notes
-        finally:
-            os.unlink(temp_path)
+        # Verify file is valid and contains both types of events
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        all_messages = []
+        for track in midi.tracks:
+            all_messages.extend(list(track))
+        
+        tempo_msgs = [m for m in all_messages if m.type == 'set_tempo']
+        time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
+        note_ons = [m for m in all_messages if m.type == 'note_on' and m.velocity > 0]
+        
+        # Should have tempo changes, time signature changes, and notes
+        assert len(tempo_msgs) >= 2
+        assert len(time_sig_msgs) >= 2
+        assert len(note_ons) == 7  # 4 notes + 3 notes
     
     def test_time_signature_in_measure(self):
         """Test time signature change within a measure context"""
@@ -1104,26 +987,20 @@ class TestMetaEventChanges:
         ast = Sequence(instruments={'piano': instrument})
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            # Should generate valid MIDI
-            midi = mido.MidiFile(temp_path)
-            all_messages = []
-            for track in midi.tracks:
-                all_messages.extend(list(track))
-            
-            time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
-            note_ons = [m for m in all_messages if m.type == 'note_on' and m.velocity > 0]
-            
-            assert len(time_sig_msgs) >= 1
-            assert time_sig_msgs[0].numerator == 3
-            assert len(note_ons) == 3
-        finally:
-            os.unlink(temp_path)
+        # Should generate valid MIDI
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        all_messages = []
+        for track in midi.tracks:
+            all_messages.extend(list(track))
+        
+        time_sig_msgs = [m for m in all_messages if m.type == 'time_signature']
+        note_ons = [m for m in all_messages if m.type == 'note_on' and m.velocity > 0]
+        
+        assert len(time_sig_msgs) >= 1
+        assert time_sig_msgs[0].numerator == 3
+        assert len(note_ons) == 3
 
 
 if __name__ == '__main__':
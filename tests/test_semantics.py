@@ -3,8 +3,10 @@ Tests for Semantic Analysis Phase
 """
 
 import pytest
+from dataclasses import fields
 from muslang.ast_nodes import *
-from muslang.semantics import SemanticAnalyzer, SemanticError
+from muslang.config import VELOCITY_MF
+from muslang.semantics import SemanticAnalyzer, SemanticError, VoiceState, WarningRecord
 
 
 def test_semantic_analyzer_creation():
@@ -180,6 +182,18 @@ def test_validate_tempo_warning():
     assert "Unusual tempo" in analyzer.warnings[0]
 
 
+def test_warnings_recorded_unformatted():
+    """Test warnings are stored as code/args records and formatted on read"""
+    analyzer = SemanticAnalyzer()
+    
+    tempo = Tempo(bpm=500)
+    instrument = Instrument(name='piano', events=[tempo], voices={1: []})
+    analyzer._validate_ast(Sequence(events=[instrument]))
+    
+    assert analyzer.warning_records == [WarningRecord('unusual_tempo', (500,))]
+    assert analyzer.warnings == ["Unusual tempo: 500 BPM"]
+
+
 def test_validate_slide_large_interval_warning():
     """Test slide with large interval generates warning"""
     analyzer = SemanticAnalyzer()
@@ -196,6 +210,27 @@ def test_validate_slide_large_interval_warning():
     assert "Large slide interval" in analyzer.warnings[0]
 
 
+def test_validate_many_slides_warns_only_large_intervals():
+    """Test slide interval check across several slides in one instrument"""
+    analyzer = SemanticAnalyzer()
+    
+    def slide(from_octave, to_octave, to_pitch='c'):
+        return Slide(
+            from_note=Note(pitches=[('c', from_octave, None)], duration=4),
+            to_note=Note(pitches=[(to_pitch, to_octave, None)], duration=4),
+        )
+    
+    slides = [slide(4, 4, 'g'), slide(2, 5), slide(4, 6), slide(6, 3, 'b')]
+    instrument = Instrument(name='piano', events=[], voices={1: slides[:2], 2: slides[2:]})
+    ast = Sequence(events=[instrument])
+    
+    analyzer._validate_ast(ast)
+    assert analyzer.warnings == [
+        "Large slide interval: 36 semitones",
+        "Large slide interval: 25 semitones",
+    ]
+
+
 def test_note_to_midi():
     """Test note to MIDI conversion"""
     analyzer = SemanticAnalyzer()
@@ -236,6 +271,84 @@ def test_note_to_midi_with_accidentals():
     assert midi == 58
 
 
+def test_note_pitches_stored_as_tuple():
+    """Test Note converts a pitch list to a tuple, including after analysis"""
+    note = Note(pitches=[('c', 4, None), ('e', 4, None)], duration=4)
+    assert note.pitches == (('c', 4, None), ('e', 4, None))
+    assert Note().pitches == ()
+    
+    analyzer = SemanticAnalyzer()
+    assert type(analyzer._apply_note_state(note, VoiceState()).pitches) is tuple
+
+
+def test_apply_note_state_copies_every_other_field():
+    """Test the hand-built copy in _apply_note_state keeps all non-state Note fields"""
+    note = Note(
+        pitches=[('c', 4, 'sharp')], duration=8, dotted=True,
+        location=SourceLocation(line=3, column=5), start_time=480.0, end_time=660.0,
+    )
+    result = SemanticAnalyzer()._apply_note_state(note, VoiceState())
+    
+    state_fields = {'velocity', 'articulation', 'dynamic_level'}
+    for f in fields(Note):
+        if f.name not in state_fields:
+            assert getattr(result, f.name) == getattr(note, f.name), f.name
+    assert (result.velocity, result.articulation, result.dynamic_level) == (VELOCITY_MF, 'natural', 'mf')
+
+
+def test_event_nodes_are_slotted():
+    """Test voice-level nodes carry no per-instance __dict__ but still report a location"""
+    note = Note(pitches=[('c', 4, None)], duration=4)
+    nodes = [
+        note, Rest(duration=4), PercussionNote(drum_sound='kick'), GraceNote(note=note),
+        Tuplet(notes=[note]), Slide(from_note=note, to_note=note), Measure(),
+        Articulation(type='legato'), DynamicLevel(level='p'), Reset(),
+        TimeSignature(numerator=3, denominator=4), Voice(number=1), Instrument(name='piano'),
+    ]
+    for node in nodes:
+        assert not hasattr(node, '__dict__'), type(node).__name__
+        assert node.location is None
+        repr(node)
+
+
+def test_instrument_iter_notes():
+    """Test iter_notes yields nested notes in order and skips everything else"""
+    c, d, e, f, g = (Note(pitches=[(p, 4, None)], duration=8) for p in 'cdefg')
+    measure = Measure(events=[GraceNote(note=c), d, Tuplet(notes=[e, f]), Rest(duration=8)])
+    instrument = Instrument(name='piano', voices={
+        1: [DynamicLevel(level='p'), measure, Slide(from_note=g, to_note=c)],
+        2: [Rest(duration=1)],
+    })
+
+    assert list(instrument.iter_notes()) == [c, d, e, f, g, c]
+    assert list(instrument.iter_notes(2)) == []
+
+
+def test_unchanged_subtrees_are_shared_not_copied():
+    """Test a pass that changes nothing returns the original nodes"""
+    analyzer = SemanticAnalyzer()
+    
+    tuplet = Tuplet(notes=[Note(pitches=[('c', 4, None)], duration=8)] * 3)
+    instrument = Instrument(name='piano', events=[], voices={1: [tuplet, Rest(duration=4)]})
+    ast = Sequence(instruments={'piano': instrument})
+    
+    # No key signature is active, so no note is touched
+    assert analyzer._apply_key_signatures(ast) is ast
+    
+    # With one, only the affected path is rebuilt
+    keyed = Instrument(name='piano', events=[], voices={
+        1: [KeySignature(root='g', mode='major'), Note(pitches=[('f', 4, None)], duration=4)],
+        2: [Rest(duration=4)],
+    })
+    result = analyzer._apply_key_signatures(keyed)
+    assert result is not keyed
+    assert result.voices[1][1].pitches == (('f', 4, 'sharp'),)
+    assert result.voices[2] is keyed.voices[2]
+    
+    # Ornament expansion leaves ornament-free trees untouched as well
+    assert analyzer._expand_ornaments(ast) is ast
+
+
 def test_full_analysis_pipeline():
     """Test full analysis pipeline with simple AST"""
     analyzer = SemanticAnalyzer()
@@ -268,6 +381,37 @@ def test_analysis_with_errors_raises():
         analyzer.analyze(ast)
 
 
+def test_reset_clears_errors_and_warnings():
+    """Test that reset() allows an analyzer to be reused"""
+    analyzer = SemanticAnalyzer()
+    
+    note = Note(pitches=[('c', 11, None)], duration=4)
+    instrument = Instrument(name='piano', events=[Tempo(bpm=500)], voices={1: [note]})
+    analyzer._validate_ast(Sequence(events=[instrument]))
+    assert analyzer.errors and analyzer.warnings
+    
+    analyzer.reset()
+    assert len(analyzer.errors) == 0
+    assert len(analyzer.warnings) == 0
+    assert analyzer.current_time_sig.numerator == 4
+    assert analyzer.current_time_sig.denominator == 4
+
+
+def test_reanalysis_sees_in_place_changes():
+    """Test that re-analyzing an AST changed in place reflects the change"""
+    analyzer = SemanticAnalyzer()
+    
+    voice = [Note(pitches=[('c', 4, None)], duration=4)]
+    ast = Sequence(instruments={'piano': Instrument(name='piano', voices={1: voice})})
+    
+    first = analyzer.analyze(ast)
+    voice.append(Note(pitches=[('d', 4, None)], duration=4))
+    second = analyzer.analyze(ast)
+    
+    assert len(first.instruments['piano'].voices[1]) == 1
+    assert len(second.instruments['piano'].voices[1]) == 2
+
+
 if __name__ == '__main__':
     # Run tests
     pytest.main([__file__, '-v'])
@@ -14,13 +14,14 @@ Tests cover:
 """
 
 import pytest
-import tempfile
-import os
-import mido
+from functools import lru_cache
+from io import BytesIO
+from itertools import accumulate
+from struct import pack, unpack_from
+from mido import MidiFile
 from muslang.parser import parse_muslang
-from muslang.semantics import SemanticAnalyzer
 from muslang.midi_gen import MIDIGenerator
-from muslang.ast_nodes import Note, Slide, Instrument, Sequence
+from muslang.ast_nodes import Note, Rest, PercussionNote, Slide, Measure, Instrument, Sequence
 from muslang.config import (
     SLIDE_STEPS, PITCH_BEND_RANGE, CC_PORTAMENTO_TIME, 
     CC_PORTAMENTO_SWITCH, VELOCITY_MF, VELOCITY_P, VELOCITY_F,
@@ -28,10 +29,89 @@ from muslang.config import (
 )
 
 
+# Node types that carry start_time/end_time after semantic analysis
+_TIMED = (Note, Rest, PercussionNote, Measure)
+
+# MIDI note numbers for the octave-4 pitches used below, keyed by
+# (pitch, octave) or (pitch, octave, accidental)
+_PITCH_TO_MIDI = {
+    ('c', 4): 60, ('c', 4, 'sharp'): 61,
+    ('d', 4): 62, ('d', 4, 'sharp'): 63,
+    ('e', 4): 64,
+    ('f', 4): 65, ('f', 4, 'sharp'): 66,
+    ('g', 4): 67,
+}
+
+
+def _midi_numbers(*pitches):
+    return [_PITCH_TO_MIDI[p] for p in pitches]
+
+
 def _voice_events(ast, instrument='piano', voice=1):
     return [event for measure in ast.instruments[instrument].voices[voice] for event in measure.events]
 
 
+@lru_cache(maxsize=None)
+def _note(pitch, octave, accidental, duration, dotted=False):
+    """Shared single-pitch Note; analysis and generation never mutate nodes in place"""
+    return Note(pitches=[(pitch, octave, accidental)], duration=duration, dotted=dotted)
+
+
+def _ast_with(*events):
+    """Single piano instrument whose voice 1 holds the given events"""
+    instrument = Instrument(name='piano', events=[], voices={1: list(events)})
+    return Sequence(instruments={'piano': instrument})
+
+
+def _read_track(data):
+    """
+    Read the messages of the first instrument track (track 0 if it is the only one).
+
+    Scans the MThd/MTrk chunk headers of the rendered MIDI bytes to slice out
+    just that track and hands mido a single-track file, so the other tracks are
+    never decoded.
+    """
+    _, header_len, _, num_tracks, division = unpack_from('>4sIHHH', data)
+    target = 1 if num_tracks > 1 else 0
+    offset = 8 + header_len
+    index = 0
+    while True:
+        chunk_type, length = unpack_from('>4sI', data, offset)
+        end = offset + 8 + length
+        if chunk_type == b'MTrk':
+            if index == target:
+                break
+            index += 1
+        offset = end
+    header = pack('>4sIHHH', b'MThd', 6, 0, 1, division)
+    midi = MidiFile(file=BytesIO(header + data[offset:end]), clip=True)
+    return list(midi.tracks[0])
+
+
+def _sounding_notes(messages):
+    """Note numbers of the sounding note_on messages, in order"""
+    return [m.note for m in messages if m.type == 'note_on' and m.velocity > 0]
+
+
+def _absolute_times(messages):
+    """Running tick totals of the messages' delta times"""
+    return accumulate(m.time for m in messages)
+
+
+def _partition(messages):
+    """Split messages into sounding note_on and control_change lists in one pass"""
+    notes, ccs = [], []
+    add_note, add_cc = notes.append, ccs.append
+    for m in messages:
+        t = m.type
+        if t == 'note_on':
+            if m.velocity > 0:
+                add_note(m)
+        elif t == 'control_change':
+            add_cc(m)
+    return notes, ccs
+
+
 # ============================================================================
 # Test Chromatic Slides (Pitch Bend)
 # ============================================================================
@@ -41,319 +121,212 @@ class TestChromaticSlide:
     
     def test_chromatic_slide_pitch_bend_generation(self):
         """Test that chromatic slide generates correct pitch bend events"""
-        from_note = Note(pitches=[('c', 4, None)], duration=4)
-        to_note = Note(pitches=[('c', 5, None)], duration=4)
+        from_note = _note('c', 4, None, 4)
+        to_note = _note('c', 5, None, 4)
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
-            
-            # Should have SLIDE_STEPS + 1 pitch bend events (including start at 0)
-            assert len(pitch_bend_msgs) >= SLIDE_STEPS, f"Expected at least {SLIDE_STEPS} pitch bend events"
-            
-            # First bend should be at or near 0 (no bend)
-            assert abs(pitch_bend_msgs[0].pitch) <= 100, "First pitch bend should be near 0"
-            
-            # Last bend should reset to 0
-            assert pitch_bend_msgs[-1].pitch == 0, "Final pitch bend should reset to 0"
-            
-            # Verify note is generated (the base note that gets bent)
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            assert len(note_ons) == 2, "Should have source and destination notes for chromatic slide"
-            assert note_ons[0].note == 60, "Note should be at original pitch (C4 = 60)"
-            
-        finally:
-            os.unlink(temp_path)
+        messages = _read_track(data)
+        pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
+        
+        # Should have SLIDE_STEPS + 1 pitch bend events (including start at 0)
+        assert len(pitch_bend_msgs) >= SLIDE_STEPS, f"Expected at least {SLIDE_STEPS} pitch bend events"
+        
+        # First bend should be at or near 0 (no bend)
+        assert abs(pitch_bend_msgs[0].pitch) <= 100, "First pitch bend should be near 0"
+        
+        # Last bend should reset to 0
+        assert pitch_bend_msgs[-1].pitch == 0, "Final pitch bend should reset to 0"
+        
+        # Verify note is generated (the base note that gets bent)
+        note_ons, _ = _partition(messages)
+        assert len(note_ons) == 2, "Should have source and destination notes for chromatic slide"
+        assert note_ons[0].note == _PITCH_TO_MIDI[('c', 4)], "Note should be at original pitch (C4)"
     
     def test_chromatic_slide_ascending(self):
         """Test ascending chromatic slide (C4 to G4)"""
-        from_note = Note(pitches=[('c', 4, None)], duration=2)
-        to_note = Note(pitches=[('g', 4, None)], duration=2)
+        from_note = _note('c', 4, None, 2)
+        to_note = _note('g', 4, None, 2)
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
-            
-            # Verify pitch bend values increase (ascending)
-            # Look at middle vs beginning (skip the final reset)
-            if len(pitch_bend_msgs) > 2:
-                middle_bend = pitch_bend_msgs[len(pitch_bend_msgs) // 2].pitch
-                first_bend = pitch_bend_msgs[0].pitch
-                assert middle_bend > first_bend, "Pitch bend should increase for ascending slide"
+        messages = _read_track(data)
+        pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
         
-        finally:
-            os.unlink(temp_path)
+        # Verify pitch bend values increase (ascending)
+        # Look at middle vs beginning (skip the final reset)
+        if len(pitch_bend_msgs) > 2:
+            middle_bend = pitch_bend_msgs[len(pitch_bend_msgs) // 2].pitch
+            first_bend = pitch_bend_msgs[0].pitch
+            assert middle_bend > first_bend, "Pitch bend should increase for ascending slide"
     
     def test_chromatic_slide_descending(self):
         """Test descending chromatic slide (C5 to C4)"""
-        from_note = Note(pitches=[('c', 5, None)], duration=2)
-        to_note = Note(pitches=[('c', 4, None)], duration=2)
+        from_note = _note('c', 5, None, 2)
+        to_note = _note('c', 4, None, 2)
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
-            
-            # Verify pitch bend values decrease (descending)
-            if len(pitch_bend_msgs) > 2:
-                middle_bend = pitch_bend_msgs[len(pitch_bend_msgs) // 2].pitch
-                first_bend = pitch_bend_msgs[0].pitch
-                assert middle_bend < first_bend, "Pitch bend should decrease for descending slide"
+        messages = _read_track(data)
+        pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
         
-        finally:
-            os.unlink(temp_path)
+        # Verify pitch bend values decrease (descending)
+        if len(pitch_bend_msgs) > 2:
+            middle_bend = pitch_bend_msgs[len(pitch_bend_msgs) // 2].pitch
+            first_bend = pitch_bend_msgs[0].pitch
+            assert middle_bend < first_bend, "Pitch bend should decrease for descending slide"
     
     def test_chromatic_slide_pitch_bend_range_clamping(self):
         """Test that pitch bend values are clamped to valid range (-8192 to 8191)"""
         # Create a slide larger than typical pitch bend range
-        from_note = Note(pitches=[('c', 2, None)], duration=1)
-        to_note = Note(pitches=[('c', 6, None)], duration=1)
+        from_note = _note('c', 2, None, 1)
+        to_note = _note('c', 6, None, 1)
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
-            
-            # All pitch bend values should be within valid range
-            for msg in pitch_bend_msgs:
-                assert -8192 <= msg.pitch <= 8191, f"Pitch bend {msg.pitch} out of valid range"
+        messages = _read_track(data)
+        pitch_bend_msgs = [m for m in messages if m.type == 'pitchwheel']
         
-        finally:
-            os.unlink(temp_path)
+        # All pitch bend values should be within valid range
+        for msg in pitch_bend_msgs:
+            assert -8192 <= msg.pitch <= 8191, f"Pitch bend {msg.pitch} out of valid range"
     
     def test_chromatic_slide_timing(self):
         """Test that pitch bend events are distributed over the duration"""
-        from_note = Note(pitches=[('c', 4, None)], duration=1)  # Whole note
-        to_note = Note(pitches=[('g', 4, None)], duration=1)
+        from_note = _note('c', 4, None, 1)  # Whole note
+        to_note = _note('g', 4, None, 1)
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            
-            # Get pitch bend messages with their absolute times
-            pitch_bend_times = []
-            current_time = 0
-            for msg in messages:
-                current_time += msg.time
-                if msg.type == 'pitchwheel':
-                    pitch_bend_times.append(current_time)
-            
-            # Verify pitch bends span the duration
-            if len(pitch_bend_times) > 1:
-                span = pitch_bend_times[-1] - pitch_bend_times[0]
-                # Should span most of the whole note duration (4 beats * ppq)
-                expected_duration = 4 * 480  # 1920 ticks
-                assert span >= expected_duration * 0.9, "Pitch bends should span the note duration"
+        messages = _read_track(data)
+        
+        # Get pitch bend messages with their absolute times
+        pitch_bend_times = [
+            t for msg, t in zip(messages, _absolute_times(messages))
+            if msg.type == 'pitchwheel'
+        ]
         
-        finally:
-            os.unlink(temp_path)
+        # Verify pitch bends span the duration
+        if len(pitch_bend_times) > 1:
+            span = pitch_bend_times[-1] - pitch_bend_times[0]
+            # Should span most of the whole note duration (4 beats * ppq)
+            expected_duration = 4 * 480  # 1920 ticks
+            assert span >= expected_duration * 0.9, "Pitch bends should span the note duration"
 
 
 # ============================================================================
 # Test Stepped Slides (Chromatic Notes)
 # ============================================================================
 
+@pytest.fixture(scope='class')
+def c4_e4_stepped_messages():
+    """Track messages for a C4 -> E4 stepped slide, generated once per test class"""
+    slide = Slide(from_note=_note('c', 4, None, 4), to_note=_note('e', 4, None, 4), style='stepped')
+    return _read_track(MIDIGenerator(ppq=480).generate_to_buffer(_ast_with(slide)))
+
+
 class TestSteppedSlide:
     """Test stepped slides with individual chromatic notes"""
     
-    def test_stepped_slide_note_sequence(self):
+    def test_stepped_slide_note_sequence(self, c4_e4_stepped_messages):
         """Test that stepped slide generates correct chromatic note sequence"""
-        from_note = Note(pitches=[('c', 4, None)], duration=4)
-        to_note = Note(pitches=[('e', 4, None)], duration=4)
-        slide = Slide(from_note=from_note, to_note=to_note, style='stepped')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
-        
-        gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
-        
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # C4 to E4 is 4 semitones plus explicit destination sustain
-            # Sequence: C, C#, D, D#, E, E
-            assert len(note_ons) == 6, f"Expected 6 notes, got {len(note_ons)}"
-            
-            # Verify note sequence is chromatic and ascending
-            expected_notes = [60, 61, 62, 63, 64, 64]
-            actual_notes = [m.note for m in note_ons]
-            assert actual_notes == expected_notes, f"Expected {expected_notes}, got {actual_notes}"
+        actual_notes = _sounding_notes(c4_e4_stepped_messages)
         
-        finally:
-            os.unlink(temp_path)
+        # C4 to E4 is 4 semitones plus explicit destination sustain
+        # Sequence: C, C#, D, D#, E, E
+        # Verify note sequence is chromatic and ascending
+        expected_notes = _midi_numbers(
+            ('c', 4), ('c', 4, 'sharp'), ('d', 4), ('d', 4, 'sharp'), ('e', 4), ('e', 4)
+        )
+        assert actual_notes == expected_notes, f"Expected {expected_notes}, got {actual_notes}"
     
     def test_stepped_slide_descending(self):
         """Test descending stepped slide"""
-        from_note = Note(pitches=[('g', 4, None)], duration=4)
-        to_note = Note(pitches=[('c', 4, None)], duration=4)
+        from_note = _note('g', 4, None, 4)
+        to_note = _note('c', 4, None, 4)
         slide = Slide(from_note=from_note, to_note=to_note, style='stepped')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # G4 to C4 plus explicit destination sustain
-            assert len(note_ons) == 9, f"Expected 9 notes, got {len(note_ons)}"
-            
-            # Verify descending sequence
-            expected_notes = [67, 66, 65, 64, 63, 62, 61, 60, 60]
-            actual_notes = [m.note for m in note_ons]
-            assert actual_notes == expected_notes, f"Expected {expected_notes}, got {actual_notes}"
+        messages = _read_track(data)
+        actual_notes = _sounding_notes(messages)
         
-        finally:
-            os.unlink(temp_path)
+        # G4 to C4 plus explicit destination sustain
+        # Verify descending sequence
+        expected_notes = _midi_numbers(
+            ('g', 4), ('f', 4, 'sharp'), ('f', 4), ('e', 4), ('d', 4, 'sharp'),
+            ('d', 4), ('c', 4, 'sharp'), ('c', 4), ('c', 4)
+        )
+        assert actual_notes == expected_notes, f"Expected {expected_notes}, got {actual_notes}"
     
     def test_stepped_slide_single_semitone(self):
         """Test stepped slide with single semitone interval"""
-        from_note = Note(pitches=[('c', 4, None)], duration=4)
-        to_note = Note(pitches=[('c', 4, 'sharp')], duration=4)
+        from_note = _note('c', 4, None, 4)
+        to_note = _note('c', 4, 'sharp', 4)
         slide = Slide(from_note=from_note, to_note=to_note, style='stepped')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
-        
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # Includes explicit destination sustain note
-            assert len(note_ons) == 3, f"Expected 3 notes, got {len(note_ons)}"
-            assert [m.note for m in note_ons] == [60, 61, 61]
+        data = gen.generate_to_buffer(ast)
         
-        finally:
-            os.unlink(temp_path)
+        messages = _read_track(data)
+        # Includes explicit destination sustain note
+        assert _sounding_notes(messages) == _midi_numbers(
+            ('c', 4), ('c', 4, 'sharp'), ('c', 4, 'sharp')
+        )
     
     def test_stepped_slide_unison(self):
         """Test stepped slide with same start and end note (unison)"""
-        from_note = Note(pitches=[('c', 4, None)], duration=4)
-        to_note = Note(pitches=[('c', 4, None)], duration=4)
+        from_note = _note('c', 4, None, 4)
+        to_note = _note('c', 4, None, 4)
         slide = Slide(from_note=from_note, to_note=to_note, style='stepped')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # Should play the note once (no steps needed)
-            assert len(note_ons) >= 1, "Should have at least one note"
+        messages = _read_track(data)
+        note_ons, _ = _partition(messages)
         
-        finally:
-            os.unlink(temp_path)
+        # Should play the note once (no steps needed)
+        assert len(note_ons) >= 1, "Should have at least one note"
     
-    def test_stepped_slide_timing_distribution(self):
+    def test_stepped_slide_timing_distribution(self, c4_e4_stepped_messages):
         """Test that stepped slide notes are evenly distributed in time"""
-        from_note = Note(pitches=[('c', 4, None)], duration=4)
-        to_note = Note(pitches=[('e', 4, None)], duration=4)
-        slide = Slide(from_note=from_note, to_note=to_note, style='stepped')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        messages = c4_e4_stepped_messages
         
-        gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
-        
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            
-            # Get note on times
-            note_on_times = []
-            current_time = 0
-            for msg in messages:
-                current_time += msg.time
-                if msg.type == 'note_on' and msg.velocity > 0:
-                    note_on_times.append(current_time)
-            
-            # Verify notes are roughly evenly spaced
-            if len(note_on_times) > 1:
-                intervals = [note_on_times[i+1] - note_on_times[i] 
-                           for i in range(len(note_on_times) - 1)]
-                avg_interval = sum(intervals) / len(intervals)
-                # All intervals should be similar
-                for interval in intervals:
-                    # Allow some variance but should be roughly equal
-                    assert abs(interval - avg_interval) < avg_interval * 0.3, \
-                        "Notes should be evenly distributed in time"
+        # Get note on times
+        note_on_times = [
+            t for msg, t in zip(messages, _absolute_times(messages))
+            if msg.type == 'note_on' and msg.velocity > 0
+        ]
         
-        finally:
-            os.unlink(temp_path)
+        # Verify notes are roughly evenly spaced
+        if len(note_on_times) > 1:
+            intervals = [b - a for a, b in zip(note_on_times, note_on_times[1:])]
+            avg_interval = sum(intervals) / len(intervals)
+            # All intervals should be similar
+            for interval in intervals:
+                # Allow some variance but should be roughly equal
+                assert abs(interval - avg_interval) < avg_interval * 0.3, \
+                    "Notes should be evenly distributed in time"
 
 
 # ============================================================================
@@ -365,67 +338,49 @@ class TestPortamentoSlide:
     
     def test_portamento_cc_generation(self):
         """Test that portamento slide generates correct CC events"""
-        from_note = Note(pitches=[('c', 4, None)], duration=2)
-        to_note = Note(pitches=[('g', 4, None)], duration=2)
+        from_note = _note('c', 4, None, 2)
+        to_note = _note('g', 4, None, 2)
         slide = Slide(from_note=from_note, to_note=to_note, style='portamento')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            cc_msgs = [m for m in messages if m.type == 'control_change']
-            
-            # Should have portamento CC messages
-            portamento_time_msgs = [m for m in cc_msgs if m.control == CC_PORTAMENTO_TIME]
-            portamento_switch_msgs = [m for m in cc_msgs if m.control == CC_PORTAMENTO_SWITCH]
-            
-            assert len(portamento_time_msgs) >= 1, "Should have portamento time CC"
-            assert len(portamento_switch_msgs) >= 1, "Should have portamento switch CC"
-            
-            # Verify portamento switch is turned on (value 127)
-            assert any(m.value == 127 for m in portamento_switch_msgs), \
-                "Portamento switch should be turned on"
-            
-            # Verify portamento time is in valid range (0-127)
-            for msg in portamento_time_msgs:
-                assert 0 <= msg.value <= 127, f"Portamento time {msg.value} out of range"
+        messages = _read_track(data)
+        _, cc_msgs = _partition(messages)
+        
+        # Should have portamento CC messages
+        portamento_time_msgs = [m for m in cc_msgs if m.control == CC_PORTAMENTO_TIME]
+        portamento_switch_msgs = [m for m in cc_msgs if m.control == CC_PORTAMENTO_SWITCH]
         
-        finally:
-            os.unlink(temp_path)
+        assert len(portamento_time_msgs) >= 1, "Should have portamento time CC"
+        assert len(portamento_switch_msgs) >= 1, "Should have portamento switch CC"
+        
+        # Verify portamento switch is turned on (value 127)
+        assert any(m.value == 127 for m in portamento_switch_msgs), \
+            "Portamento switch should be turned on"
+        
+        # Verify portamento time is in valid range (0-127)
+        for msg in portamento_time_msgs:
+            assert 0 <= msg.value <= 127, f"Portamento time {msg.value} out of range"
     
     def test_portamento_note_generation(self):
         """Test that portamento slide generates both from_note and to_note"""
-        from_note = Note(pitches=[('c', 4, None)], duration=4)
-        to_note = Note(pitches=[('g', 4, None)], duration=4)
+        from_note = _note('c', 4, None, 4)
+        to_note = _note('g', 4, None, 4)
         slide = Slide(from_note=from_note, to_note=to_note, style='portamento')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # Should have both from_note and to_note
-            assert len(note_ons) == 2, f"Expected 2 notes for portamento, got {len(note_ons)}"
-            assert note_ons[0].note == 60, "First note should be C4 (60)"
-            assert note_ons[1].note == 67, "Second note should be G4 (67)"
+        messages = _read_track(data)
+        note_ons, _ = _partition(messages)
         
-        finally:
-            os.unlink(temp_path)
+        # Should have both from_note and to_note
+        assert len(note_ons) == 2, f"Expected 2 notes for portamento, got {len(note_ons)}"
+        assert note_ons[0].note == _PITCH_TO_MIDI[('c', 4)], "First note should be C4"
+        assert note_ons[1].note == _PITCH_TO_MIDI[('g', 4)], "Second note should be G4"
 
 
 # ============================================================================
@@ -440,62 +395,42 @@ class TestSlideDuration:
         durations = [1, 2, 4, 8, 16]  # whole, half, quarter, eighth, sixteenth
         
         for duration in durations:
-            from_note = Note(pitches=[('c', 4, None)], duration=duration)
-            to_note = Note(pitches=[('g', 4, None)], duration=duration)
+            from_note = _note('c', 4, None, duration)
+            to_note = _note('g', 4, None, duration)
             slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-            instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-            ast = Sequence(instruments={'piano': instrument})
+            ast = _ast_with(slide)
             
             gen = MIDIGenerator(ppq=480)
-            with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-                temp_path = f.name
+            data = gen.generate_to_buffer(ast)
             
-            try:
-                gen.generate(ast, temp_path)
-                
-                midi = mido.MidiFile(temp_path)
-                messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-                
-                # Should generate MIDI successfully
-                note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-                assert len(note_ons) >= 1, f"Should generate notes for duration {duration}"
+            messages = _read_track(data)
             
-            finally:
-                os.unlink(temp_path)
+            # Should generate MIDI successfully
+            note_ons, _ = _partition(messages)
+            assert len(note_ons) >= 1, f"Should generate notes for duration {duration}"
     
     def test_slide_with_dotted_note(self):
         """Test slide with dotted note duration"""
-        from_note = Note(pitches=[('c', 4, None)], duration=4, dotted=True)  # Dotted quarter
-        to_note = Note(pitches=[('g', 4, None)], duration=4, dotted=True)
+        from_note = _note('c', 4, None, 4, dotted=True)  # Dotted quarter
+        to_note = _note('g', 4, None, 4, dotted=True)
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(ast)
         
-        try:
-            gen.generate(ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            assert len(note_ons) >= 1, "Should generate notes for dotted duration"
+        messages = _read_track(data)
+        note_ons, _ = _partition(messages)
         
-        finally:
-            os.unlink(temp_path)
+        assert len(note_ons) >= 1, "Should generate notes for dotted duration"
     
-    def test_slide_timing_with_semantic_analysis(self):
+    def test_slide_timing_with_semantic_analysis(self, analyzer):
         """Test that semantic analysis correctly calculates slide timing"""
-        from_note = Note(pitches=[('c', 4, None)], duration=4)
-        to_note = Note(pitches=[('g', 4, None)], duration=4)
+        from_note = _note('c', 4, None, 4)
+        to_note = _note('g', 4, None, 4)
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         # Check that timing was calculated
@@ -528,22 +463,15 @@ class TestSlideIntervals:
         ]
         
         for pitch1, oct1, pitch2, oct2, acc2 in intervals:
-            from_note = Note(pitches=[(pitch1, oct1, None)], duration=4)
-            to_note = Note(pitches=[(pitch2, oct2, acc2)], duration=4)
+            from_note = _note(pitch1, oct1, None, 4)
+            to_note = _note(pitch2, oct2, acc2, 4)
             slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-            instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-            ast = Sequence(instruments={'piano': instrument})
+            ast = _ast_with(slide)
             
             gen = MIDIGenerator(ppq=480)
-            with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-                temp_path = f.name
-            
-            try:
-                gen.generate(ast, temp_path)
-                # Should generate successfully
-                assert os.path.exists(temp_path)
-            finally:
-                os.unlink(temp_path)
+            data = gen.generate_to_buffer(ast)
+            # Should generate successfully
+            assert data[:4] == b'MThd'
     
     def test_slide_medium_interval(self):
         """Test slide with medium interval (4-12 semitones)"""
@@ -554,21 +482,14 @@ class TestSlideIntervals:
         ]
         
         for pitch1, oct1, pitch2, oct2 in intervals:
-            from_note = Note(pitches=[(pitch1, oct1, None)], duration=4)
-            to_note = Note(pitches=[(pitch2, oct2, None)], duration=4)
+            from_note = _note(pitch1, oct1, None, 4)
+            to_note = _note(pitch2, oct2, None, 4)
             slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-            instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-            ast = Sequence(instruments={'piano': instrument})
+            ast = _ast_with(slide)
             
             gen = MIDIGenerator(ppq=480)
-            with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-                temp_path = f.name
-            
-            try:
-                gen.generate(ast, temp_path)
-                assert os.path.exists(temp_path)
-            finally:
-                os.unlink(temp_path)
+            data = gen.generate_to_buffer(ast)
+            assert data[:4] == b'MThd'
     
     def test_slide_large_interval(self):
         """Test slide with large interval (13-24 semitones)"""
@@ -578,31 +499,22 @@ class TestSlideIntervals:
         ]
         
         for pitch1, oct1, pitch2, oct2 in intervals:
-            from_note = Note(pitches=[(pitch1, oct1, None)], duration=2)
-            to_note = Note(pitches=[(pitch2, oct2, None)], duration=2)
+            from_note = _note(pitch1, oct1, None, 2)
+            to_note = _note(pitch2, oct2, None, 2)
             slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-            instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-            ast = Sequence(instruments={'piano': instrument})
+            ast = _ast_with(slide)
             
             gen = MIDIGenerator(ppq=480)
-            with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-                temp_path = f.name
-            
-            try:
-                gen.generate(ast, temp_path)
-                assert os.path.exists(temp_path)
-            finally:
-                os.unlink(temp_path)
+            data = gen.generate_to_buffer(ast)
+            assert data[:4] == b'MThd'
     
-    def test_slide_extreme_interval_warning(self):
+    def test_slide_extreme_interval_warning(self, analyzer):
         """Test that very large slide intervals generate warning"""
-        from_note = Note(pitches=[('c', 2, None)], duration=1)
-        to_note = Note(pitches=[('c', 5, None)], duration=1)  # 36 semitones
+        from_note = _note('c', 2, None, 1)
+        to_note = _note('c', 5, None, 1)  # 36 semitones
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         # Should generate warning for large interval (> 24 semitones)
@@ -618,7 +530,7 @@ class TestSlideIntervals:
 class TestSlideIntegration:
     """Test slides with dynamics, articulation, and voices"""
     
-    def test_slide_with_dynamics(self):
+    def test_slide_with_dynamics(self, analyzer):
         """Test that slide inherits dynamic level"""
         source = """
                 piano {
@@ -626,29 +538,20 @@ class TestSlideIntegration:
                 }
         """
         ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(analyzed_ast)
         
-        try:
-            gen.generate(analyzed_ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # Velocity should reflect piano (p) dynamic
-            assert len(note_ons) >= 1
-            assert note_ons[0].velocity == VELOCITY_P, \
-                f"Expected velocity {VELOCITY_P}, got {note_ons[0].velocity}"
+        messages = _read_track(data)
+        note_ons, _ = _partition(messages)
         
-        finally:
-            os.unlink(temp_path)
+        # Velocity should reflect piano (p) dynamic
+        assert len(note_ons) >= 1
+        assert note_ons[0].velocity == VELOCITY_P, \
+            f"Expected velocity {VELOCITY_P}, got {note_ons[0].velocity}"
     
-    def test_slide_with_crescendo(self):
+    def test_slide_with_crescendo(self, analyzer):
         """Test slide during crescendo"""
         source = """
                 piano {
@@ -656,29 +559,20 @@ class TestSlideIntegration:
                 }
         """
         ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(analyzed_ast)
         
-        try:
-            gen.generate(analyzed_ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # Should have increasing velocities during crescendo
-            assert len(note_ons) >= 2
-            # First slide should be softer than last note
-            assert note_ons[0].velocity < note_ons[-1].velocity
+        messages = _read_track(data)
+        note_ons, _ = _partition(messages)
         
-        finally:
-            os.unlink(temp_path)
+        # Should have increasing velocities during crescendo
+        assert len(note_ons) >= 2
+        # First slide should be softer than last note
+        assert note_ons[0].velocity < note_ons[-1].velocity
     
-    def test_slide_sequence(self):
+    def test_slide_sequence(self, analyzer):
         """Test multiple slides in sequence"""
         source = """
                 piano {
@@ -686,27 +580,18 @@ class TestSlideIntegration:
                 }
         """
         ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(analyzed_ast)
         
-        try:
-            gen.generate(analyzed_ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            
-            # Should generate successfully
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            assert len(note_ons) >= 3, "Should have notes from all three slides"
+        messages = _read_track(data)
         
-        finally:
-            os.unlink(temp_path)
+        # Should generate successfully
+        note_ons, _ = _partition(messages)
+        assert len(note_ons) >= 3, "Should have notes from all three slides"
     
-    def test_slide_in_multiple_voices(self):
+    def test_slide_in_multiple_voices(self, analyzer):
         """Test slides in different voices"""
         source = """
                 piano {
@@ -715,27 +600,18 @@ class TestSlideIntegration:
                 }
         """
         ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(analyzed_ast)
         
-        try:
-            gen.generate(analyzed_ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # Should have notes from both voices
-            assert len(note_ons) >= 2, "Should have notes from both voices"
+        messages = _read_track(data)
+        note_ons, _ = _partition(messages)
         
-        finally:
-            os.unlink(temp_path)
+        # Should have notes from both voices
+        assert len(note_ons) >= 2, "Should have notes from both voices"
     
-    def test_stepped_slide_with_forte(self):
+    def test_stepped_slide_with_forte(self, analyzer):
         """Test stepped slide with forte dynamic"""
         source = """
                 piano {
@@ -743,28 +619,19 @@ class TestSlideIntegration:
                 }
         """
         ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         gen = MIDIGenerator(ppq=480)
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+        data = gen.generate_to_buffer(analyzed_ast)
         
-        try:
-            gen.generate(analyzed_ast, temp_path)
-            
-            midi = mido.MidiFile(temp_path)
-            messages = list(midi.tracks[1]) if len(midi.tracks) > 1 else list(midi.tracks[0])
-            note_ons = [m for m in messages if m.type == 'note_on' and m.velocity > 0]
-            
-            # All notes should have forte velocity
-            assert len(note_ons) >= 1
-            for note_on in note_ons:
-                assert note_on.velocity == VELOCITY_F, \
-                    f"Expected velocity {VELOCITY_F}, got {note_on.velocity}"
+        messages = _read_track(data)
+        note_ons, _ = _partition(messages)
         
-        finally:
-            os.unlink(temp_path)
+        # All notes should have forte velocity
+        assert len(note_ons) >= 1
+        for note_on in note_ons:
+            assert note_on.velocity == VELOCITY_F, \
+                f"Expected velocity {VELOCITY_F}, got {note_on.velocity}"
 
 
 # ============================================================================
@@ -890,49 +757,43 @@ class TestSlideParser:
 class TestSlideSemantics:
     """Test semantic analysis and validation of slides"""
     
-    def test_slide_large_interval_warning(self):
+    def test_slide_large_interval_warning(self, analyzer):
         """Test that large slide intervals generate warnings"""
-        from_note = Note(pitches=[('c', 2, None)], duration=1)
-        to_note = Note(pitches=[('g', 5, None)], duration=1)  # Very large interval
+        from_note = _note('c', 2, None, 1)
+        to_note = _note('g', 5, None, 1)  # Very large interval
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         # Should have warning about large interval
         assert len(analyzer.warnings) > 0
         assert any("slide" in w.lower() for w in analyzer.warnings)
     
-    def test_slide_reasonable_interval_no_warning(self):
+    def test_slide_reasonable_interval_no_warning(self, analyzer):
         """Test that reasonable slide intervals don't generate warnings"""
-        from_note = Note(pitches=[('c', 4, None)], duration=2)
-        to_note = Note(pitches=[('c', 5, None)], duration=2)  # One octave
+        from_note = _note('c', 4, None, 2)
+        to_note = _note('c', 5, None, 2)  # One octave
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
-        instrument = Instrument(name='piano', events=[], voices={1: [slide]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide)
         
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         # Should not have warnings for reasonable interval
         slide_warnings = [w for w in analyzer.warnings if "slide" in w.lower()]
         assert len(slide_warnings) == 0
     
-    def test_slide_timing_calculation(self):
+    def test_slide_timing_calculation(self, analyzer):
         """Test that slides get correct start_time and end_time"""
-        from_note = Note(pitches=[('c', 4, None)], duration=4)
-        to_note = Note(pitches=[('g', 4, None)], duration=4)
+        from_note = _note('c', 4, None, 4)
+        to_note = _note('g', 4, None, 4)
         slide = Slide(from_note=from_note, to_note=to_note, style='chromatic')
         
         # Add another event after the slide
-        note_after = Note(pitches=[('e', 4, None)], duration=4)
+        note_after = _note('e', 4, None, 4)
         
-        instrument = Instrument(name='piano', events=[], voices={1: [slide, note_after]})
-        ast = Sequence(instruments={'piano': instrument})
+        ast = _ast_with(slide, note_after)
         
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
         
         analyzed_slide = analyzed_ast.instruments['piano'].voices[1][0]
@@ -947,7 +808,7 @@ class TestSlideSemantics:
         # Next note should start after full slide duration (from + to note)
         assert analyzed_note.start_time == analyzed_slide.to_note.end_time
     
-    def test_slide_in_integrated_sequence(self):
+    def test_slide_in_integrated_sequence(self, analyzer):
         """Test slide timing in complete sequence with other elements"""
         source = """
                 piano {
@@ -955,19 +816,18 @@ class TestSlideSemantics:
                 }
         """
         ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
         analyzed_ast = analyzer.analyze(ast)
 
         events = _voice_events(analyzed_ast)
         
         # Verify timing sequence
         for i, event in enumerate(events):
-            if hasattr(event, 'start_time'):
+            if isinstance(event, _TIMED):
                 assert event.start_time is not None
                 assert event.end_time is not None
                 
                 # Each event should start when previous ends (or at 0 for first)
-                if i > 0 and hasattr(events[i-1], 'end_time'):
+                if i > 0 and isinstance(events[i-1], _TIMED):
                     # Allow small floating point tolerance
                     time_diff = abs(event.start_time - events[i-1].end_time)
                     assert time_diff < 0.001, \
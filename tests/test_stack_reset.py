@@ -304,6 +304,37 @@ class TestScopeInitialization:
         
         # After 3 resets: natural (system)
         assert processed_events[7].articulation == 'natural'
+    
+    def test_voices_sharing_defaults_start_independent(self):
+        """Test that voices built from the same defaults don't share stacks."""
+        instrument = Instrument(
+            name='piano',
+            events=[],
+            voices={
+                1: [
+                    Articulation(type='staccato'),
+                    Note(pitches=[('c', 4, None)], duration=4),
+                ],
+                2: [
+                    Reset(type='articulation'),  # Pops composition default
+                    Note(pitches=[('e', 4, None)], duration=4),
+                    Reset(type='articulation'),  # Already at system default
+                    Note(pitches=[('g', 4, None)], duration=4),
+                ],
+            },
+        )
+        seq = Sequence(
+            events=[instrument],
+            composition_defaults={'articulation': 'legato'}
+        )
+        
+        analyzer = SemanticAnalyzer()
+        result = analyzer.analyze(seq)
+        
+        voices = result.events[0].voices
+        assert voices[1][1].articulation == 'staccato'
+        assert voices[2][1].articulation == 'natural'
+        assert voices[2][3].articulation == 'natural'
 
 
 class TestEdgeCases:
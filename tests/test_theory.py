@@ -6,147 +6,101 @@ import pytest
 from muslang.ast_nodes import Note, KeySignature
 from muslang.theory import (
     KeySignatureInfo,
+    get_key_signature,
     get_upper_neighbor,
     get_lower_neighbor,
     expand_ornament,
-    apply_key_signature_to_note
+    apply_key_signature_to_note,
+    pitch_to_midi,
+    pitches_to_midi
 )
 
+pytestmark = [pytest.mark.theory]
 
-def test_key_signature_c_major():
-    """Test C major key signature (no accidentals)"""
-    key = KeySignatureInfo('c', 'major')
-    
-    assert len(key.accidentals) == 0
-    assert not key.affects_pitch('c')
-    assert not key.affects_pitch('d')
-    assert not key.affects_pitch('f')
-
+# Note duration -> length in 1/128-note units
+_UNITS = {1: 128, 2: 64, 4: 32, 8: 16, 16: 8, 32: 4, 64: 2, 128: 1}
 
-def test_key_signature_g_major():
-    """Test G major key signature (F#)"""
-    key = KeySignatureInfo('g', 'major')
-    
-    assert len(key.accidentals) == 1
-    assert key.affects_pitch('f')
-    assert key.get_accidental('f') == 'sharp'
-    assert not key.affects_pitch('c')
 
+def _total_units(notes):
+    """Total length of notes in 1/128-note units (dotted adds half)"""
+    return sum(
+        (_UNITS[n.duration] * 3) // 2 if n.dotted else _UNITS[n.duration]
+        for n in notes
+    )
 
-def test_key_signature_d_major():
-    """Test D major key signature (F#, C#)"""
-    key = KeySignatureInfo('d', 'major')
-    
-    assert len(key.accidentals) == 2
-    assert key.affects_pitch('f')
-    assert key.affects_pitch('c')
-    assert key.get_accidental('f') == 'sharp'
-    assert key.get_accidental('c') == 'sharp'
 
+# Pitch tuples and input notes shared by the ornament tests. The theory
+# functions never mutate their input note, so one instance serves every test.
+C4 = ('c', 4, None)
+D4 = ('d', 4, None)
+E4 = ('e', 4, None)
 
-def test_key_signature_f_major():
-    """Test F major key signature (Bb)"""
-    key = KeySignatureInfo('f', 'major')
-    
-    assert len(key.accidentals) == 1
-    assert key.affects_pitch('b')
-    assert key.get_accidental('b') == 'flat'
+QUARTER_C4 = Note(pitches=[C4], duration=4)
+QUARTER_D4 = Note(pitches=[D4], duration=4)
+QUARTER_E4 = Note(pitches=[E4], duration=4)
+HALF_C4 = Note(pitches=[C4], duration=2)
 
 
-def test_key_signature_a_minor():
-    """Test A minor key signature (no accidentals, natural minor)"""
-    key = KeySignatureInfo('a', 'minor')
+@pytest.mark.parametrize("tonic,mode,expected", [
+    ('c', 'major', {}),                              # No accidentals
+    ('g', 'major', {'f': 'sharp'}),                  # F#
+    ('d', 'major', {'f': 'sharp', 'c': 'sharp'}),    # F#, C#
+    ('f', 'major', {'b': 'flat'}),                   # Bb
+    ('a', 'minor', {}),                              # Natural minor, no accidentals
+    ('e', 'minor', {'f': 'sharp'}),                  # F#
+])
+def test_key_signature(tonic, mode, expected):
+    """Test key signature accidentals and per-pitch lookups"""
+    key = KeySignatureInfo(tonic, mode)
     
-    assert len(key.accidentals) == 0
-    assert not key.affects_pitch('c')
-    assert not key.affects_pitch('f')
+    assert dict(key.accidentals) == expected
+    for pitch in 'cdefgab':
+        assert key.affects_pitch(pitch) == (pitch in expected)
+        assert key.get_accidental(pitch) == expected.get(pitch)
 
 
-def test_key_signature_e_minor():
-    """Test E minor key signature (F#)"""
-    key = KeySignatureInfo('e', 'minor')
+def test_get_key_signature_is_cached():
+    """Test that the key signature factory shares one instance per key"""
+    key = get_key_signature('g', 'major')
     
-    assert len(key.accidentals) == 1
-    assert key.affects_pitch('f')
+    assert key is get_key_signature('g', 'major')
+    assert key is not get_key_signature('g', 'minor')
     assert key.get_accidental('f') == 'sharp'
+    assert key.get_accidental('F') == 'sharp'
+    assert key.get_accidental('c') is None
 
 
-def test_get_upper_neighbor_no_key():
-    """Test getting upper neighbor without key signature"""
-    note = Note(pitches=[('c', 4, None)], duration=4)
-    upper = get_upper_neighbor(note)
-    
-    assert upper.pitches[0][0] == 'd'
-    assert upper.pitches[0][1] == 4
-    assert upper.duration == 32  # Grace note duration
-
-
-def test_get_upper_neighbor_octave_wrap():
-    """Test upper neighbor wraps to next octave at B"""
-    note = Note(pitches=[('b', 4, None)], duration=4)
-    upper = get_upper_neighbor(note)
-    
-    assert upper.pitches[0][0] == 'c'
-    assert upper.pitches[0][1] == 5  # Should wrap to next octave
-
-
-def test_get_upper_neighbor_with_key():
-    """Test upper neighbor respects key signature"""
-    key = KeySignatureInfo('g', 'major')  # F#
-    note = Note(pitches=[('e', 4, None)], duration=4)
-    upper = get_upper_neighbor(note, key)
-    
-    assert upper.pitches[0][0] == 'f'
-    assert upper.pitches[0][2] == 'sharp'  # Should be F# in G major
-
-
-def test_get_lower_neighbor_no_key():
-    """Test getting lower neighbor without key signature"""
-    note = Note(pitches=[('d', 4, None)], duration=4)
-    lower = get_lower_neighbor(note)
+@pytest.mark.parametrize("neighbor,pitch,octave,key,expected", [
+    (get_upper_neighbor, 'c', 4, None, ('d', 4, None)),
+    (get_upper_neighbor, 'b', 4, None, ('c', 5, None)),                # Wraps to next octave
+    (get_upper_neighbor, 'e', 4, 'g_major', ('f', 4, 'sharp')),        # F# in G major
+    (get_lower_neighbor, 'd', 4, None, ('c', 4, None)),
+    (get_lower_neighbor, 'c', 4, None, ('b', 3, None)),                # Wraps to previous octave
+    (get_lower_neighbor, 'c', 4, 'f_major', ('b', 3, 'flat')),         # Bb in F major
+])
+def test_neighbor(request, neighbor, pitch, octave, key, expected):
+    """Test upper/lower neighbors, octave wrapping and key signatures"""
+    key_sig = request.getfixturevalue(key) if key else None
+    note = Note(pitches=[(pitch, octave, None)], duration=4)
+    result = neighbor(note, key_sig)
     
-    assert lower.pitches[0][0] == 'c'
-    assert lower.pitches[0][1] == 4
-    assert lower.duration == 32
-
-
-def test_get_lower_neighbor_octave_wrap():
-    """Test lower neighbor wraps to previous octave at C"""
-    note = Note(pitches=[('c', 4, None)], duration=4)
-    lower = get_lower_neighbor(note)
-    
-    assert lower.pitches[0][0] == 'b'
-    assert lower.pitches[0][1] == 3  # Should wrap to previous octave
-
-
-def test_get_lower_neighbor_with_key():
-    """Test lower neighbor respects key signature"""
-    key = KeySignatureInfo('f', 'major')  # Bb
-    note = Note(pitches=[('c', 4, None)], duration=4)
-    lower = get_lower_neighbor(note, key)
-    
-    assert lower.pitches[0][0] == 'b'
-    assert lower.pitches[0][2] == 'flat'  # Should be Bb in F major
+    assert result.pitches[0] == expected
+    assert result.duration == 32  # Grace note duration
 
 
 def test_expand_trill():
     """Test trill expansion"""
-    note = Note(pitches=[('c', 4, None)], duration=4)
-    notes = expand_ornament('trill', note)
+    notes = expand_ornament('trill', QUARTER_C4)
     
-    assert len(notes) == 8  # 8 fast notes
-    # Should alternate between main note and upper neighbor
-    assert notes[0].pitches[0][0] == 'c'
-    assert notes[1].pitches[0][0] == 'd'
-    assert notes[2].pitches[0][0] == 'c'
-    assert notes[3].pitches[0][0] == 'd'
+    letters = [n.pitches[0][0] for n in notes]
+    
+    # 8 fast notes alternating between main note and upper neighbor
+    assert letters == ['c', 'd'] * 4
 
 
-def test_expand_trill_with_key():
+def test_expand_trill_with_key(g_major):
     """Test trill expansion with key signature"""
-    key = KeySignatureInfo('g', 'major')  # F#
-    note = Note(pitches=[('e', 4, None)], duration=4)
-    notes = expand_ornament('trill', note, key)
+    notes = expand_ornament('trill', QUARTER_E4, g_major)
     
     assert len(notes) == 8
     # Should trill to F# (upper neighbor in G major)
@@ -156,100 +110,74 @@ def test_expand_trill_with_key():
 
 def test_expand_trill_fills_note_duration():
     """Trill expansion should preserve total duration of principal note"""
-    note = Note(pitches=[('c', 4, None)], duration=2)  # half note
-    notes = expand_ornament('trill', note)
-
-    total_units = 0
-    for expanded_note in notes:
-        base_units = 128 // expanded_note.duration
-        if expanded_note.dotted:
-            base_units = (base_units * 3) // 2
-        total_units += base_units
+    notes = expand_ornament('trill', HALF_C4)
 
     # Half note = 64 1/128-note units
-    assert total_units == 64
+    assert _total_units(notes) == 64
 
 
 def test_expand_mordent():
     """Test mordent expansion"""
-    note = Note(pitches=[('d', 4, None)], duration=4)
-    notes = expand_ornament('mordent', note)
+    notes = expand_ornament('mordent', QUARTER_D4)
     
-    assert len(notes) == 3  # Main, lower, main
-    assert notes[0].pitches[0][0] == 'd'
-    assert notes[1].pitches[0][0] == 'c'  # Lower neighbor
-    assert notes[2].pitches[0][0] == 'd'
+    letters = [n.pitches[0][0] for n in notes]
+    
+    assert letters == ['d', 'c', 'd']  # Main, lower neighbor, main
 
-    total_units = 0
-    for expanded_note in notes:
-        base_units = 128 // expanded_note.duration
-        if expanded_note.dotted:
-            base_units = (base_units * 3) // 2
-        total_units += base_units
-    assert total_units == 32  # Quarter note duration preserved
+    assert _total_units(notes) == 32  # Quarter note duration preserved
 
 
 def test_expand_turn():
     """Test turn expansion"""
-    note = Note(pitches=[('d', 4, None)], duration=4)
-    notes = expand_ornament('turn', note)
+    notes = expand_ornament('turn', QUARTER_D4)
+    
+    letters = [n.pitches[0][0] for n in notes]
     
-    assert len(notes) == 4  # Upper, main, lower, main
-    assert notes[0].pitches[0][0] == 'e'  # Upper neighbor
-    assert notes[1].pitches[0][0] == 'd'  # Main
-    assert notes[2].pitches[0][0] == 'c'  # Lower neighbor
-    assert notes[3].pitches[0][0] == 'd'  # Main
+    assert letters == ['e', 'd', 'c', 'd']  # Upper, main, lower, main
 
-    total_units = 0
-    for expanded_note in notes:
-        base_units = 128 // expanded_note.duration
-        if expanded_note.dotted:
-            base_units = (base_units * 3) // 2
-        total_units += base_units
-    assert total_units == 32  # Quarter note duration preserved
+    assert _total_units(notes) == 32  # Quarter note duration preserved
 
 
 def test_expand_tremolo():
     """Test tremolo expansion"""
-    note = Note(pitches=[('d', 4, None)], duration=4)
-    notes = expand_ornament('tremolo', note)
+    notes = expand_ornament('tremolo', QUARTER_D4)
 
-    assert len(notes) == 4  # 4 x 16th notes in a quarter note
-    assert all(n.pitches[0][0] == 'd' for n in notes)
-    assert all(n.duration == 16 for n in notes)
+    letters = [n.pitches[0][0] for n in notes]
+    durations = [n.duration for n in notes]
+    
+    # 4 x 16th notes in a quarter note
+    assert letters == ['d'] * 4
+    assert durations == [16] * 4
 
 
-def test_apply_key_signature_to_note():
-    """Test applying key signature to note"""
-    key = KeySignatureInfo('g', 'major')  # F#
-    note = Note(pitches=[('f', 4, None)], duration=4)
+@pytest.mark.parametrize("pitch,expected", [
+    (('f', 4, None), ('f', 4, 'sharp')),         # Key accidental applied
+    (('f', 4, 'natural'), ('f', 4, 'natural')),  # Explicit accidental preserved
+    (('c', 4, None), ('c', 4, None)),            # Unaffected pitch unchanged
+])
+def test_apply_key_signature_to_note(g_major, pitch, expected):
+    """Test applying the G major key signature (F#) to a note"""
+    note = Note(pitches=[pitch], duration=4)
     
-    result = apply_key_signature_to_note(note, key)
+    result = apply_key_signature_to_note(note, g_major)
     
-    assert result.pitches[0][0] == 'f'
-    assert result.pitches[0][2] == 'sharp'
+    assert result.pitches[0] == expected
 
 
-def test_apply_key_signature_preserves_explicit_accidental():
-    """Test that explicit accidentals are not overridden"""
-    key = KeySignatureInfo('g', 'major')  # F#
-    note = Note(pitches=[('f', 4, 'natural')], duration=4)
-    
-    result = apply_key_signature_to_note(note, key)
-    
-    # Should preserve the natural accidental
-    assert result.pitches[0][2] == 'natural'
+def test_pitch_to_midi():
+    """Test pitch tuple to MIDI note number conversion"""
+    assert pitch_to_midi('c', 4, None) == 60
+    assert pitch_to_midi('c', 4, 'sharp') == 61
+    assert pitch_to_midi('b', 3, 'flat') == 58
+    assert pitch_to_midi('f', 4, 'natural') == 65
+    assert pitch_to_midi('c', 2, None) - pitch_to_midi('c', 5, None) == -36
 
 
-def test_apply_key_signature_unaffected_pitch():
-    """Test that unaffected pitches remain unchanged"""
-    key = KeySignatureInfo('g', 'major')  # F#
-    note = Note(pitches=[('c', 4, None)], duration=4)
-    
-    result = apply_key_signature_to_note(note, key)
-    
-    assert result.pitches[0][0] == 'c'
-    assert result.pitches[0][2] is None  # Should remain None
+def test_pitches_to_midi_matches_single_conversion():
+    """Test batch pitch conversion agrees with pitch_to_midi"""
+    pitches = [('c', 4, None), ('c', 4, 'sharp'), ('b', 3, 'flat'), ('g', 9, None)]
+    assert pitches_to_midi(pitches) == [pitch_to_midi(*p) for p in pitches]
+    assert pitches_to_midi([]) == []
 
 
 if __name__ == '__main__':
@@ -3,6 +3,7 @@ Tests for timing calculation and state tracking in semantic analysis.
 """
 
 import pytest
+from fractions import Fraction
 from muslang.ast_nodes import *
 from muslang.semantics import SemanticAnalyzer, SemanticError
 from muslang.config import *
@@ -131,17 +132,13 @@ class TestTimingCalculation:
         
         processed_tuplet = result.events[0].voices[1][0]
         
-        # Tuplet should fit 3 notes into space of half note (2*PPQ)
-        expected_per_note = (2 * DEFAULT_MIDI_PPQ) / 3
+        # Tuplet should fit 3 notes into space of half note (2*PPQ). Timing is
+        # exact, so each boundary is the nearest float to k * (2*PPQ) / 3
+        boundaries = [(2 * DEFAULT_MIDI_PPQ * k) / 3 for k in range(4)]
         
-        assert processed_tuplet.notes[0].start_time == 0.0
-        assert abs(processed_tuplet.notes[0].end_time - expected_per_note) < 0.01
-        
-        assert abs(processed_tuplet.notes[1].start_time - expected_per_note) < 0.01
-        assert abs(processed_tuplet.notes[1].end_time - 2 * expected_per_note) < 0.01
-        
-        assert abs(processed_tuplet.notes[2].start_time - 2 * expected_per_note) < 0.01
-        assert abs(processed_tuplet.notes[2].end_time - 3 * expected_per_note) < 0.01
+        assert [n.start_time for n in processed_tuplet.notes] == boundaries[:3]
+        assert [n.end_time for n in processed_tuplet.notes] == boundaries[1:]
+        assert processed_tuplet.notes[2].end_time == 2 * DEFAULT_MIDI_PPQ
     
     def test_grace_note_timing(self):
         """Test timing for grace notes"""
@@ -235,6 +232,22 @@ class TestTimingCalculation:
         
         # Dotted quarter note
         assert analyzer._duration_to_ticks(4, True) == DEFAULT_MIDI_PPQ * 1.5
+    
+    def test_whole_tick_durations_are_ints(self):
+        """Test exact tick values stay plain ints unless they are fractional"""
+        analyzer = SemanticAnalyzer()
+        
+        assert type(analyzer._duration_to_ticks(4, True)) is int
+        
+        # Triplet steps are whole ticks; septuplet steps of a half note are not
+        triplet = Tuplet(notes=[Note(pitches=[('c', 4, None)], duration=8)] * 3, ratio=3, actual_duration=4)
+        septuplet = Tuplet(notes=[Note(pitches=[('c', 4, None)], duration=8)] * 7, ratio=7, actual_duration=2)
+        _, triplet_ticks = analyzer._calculate_event_timing(triplet, 0)
+        timed, septuplet_ticks = analyzer._calculate_event_timing(septuplet, 0)
+        
+        assert type(triplet_ticks) is int and type(septuplet_ticks) is int
+        assert timed.notes[1].start_time == float(Fraction(2 * DEFAULT_MIDI_PPQ, 7))
+        assert timed.notes[-1].end_time == 2 * DEFAULT_MIDI_PPQ
 
     def test_measure_duration_mismatch_includes_instrument_and_line(self):
         """Mismatch errors include instrument and source line context when available."""
@@ -601,6 +614,29 @@ class TestIntegratedTimingAndState:
         assert violin_notes[0].start_time == 0.0
         assert violin_notes[0].velocity == VELOCITY_F
         assert violin_notes[0].articulation == 'legato'
+    
+    def test_fused_pass_matches_separate_passes(self):
+        """Test single-walk timing and state matches timing then state"""
+        events = [
+            DynamicLevel(level='p'),
+            Articulation(type='staccato'),
+            Note(pitches=[('c', 4, None)], duration=4),
+            DynamicTransition(type='crescendo'),
+            Note(pitches=[('d', 4, None)], duration=8, dotted=True),
+            Reset(type='articulation'),
+            Rest(duration=16),
+            Note(pitches=[('e', 4, None), ('g', 4, None)], duration=2),
+        ]
+        instrument = Instrument(name='piano', events=[], voices={1: events, 2: list(events)})
+        solo = Instrument(name='violin', events=[], voices={1: list(events)})
+        seq = Sequence(events=[instrument, solo])
+        
+        separate = SemanticAnalyzer()
+        expected = separate._track_state(separate._calculate_timing(seq))
+        fused = SemanticAnalyzer()._calculate_timing_and_state(seq)
+        
+        assert fused.events[0].voices == expected.events[0].voices
+        assert fused.events[1].voices == expected.events[1].voices
 
 
 class TestMetaEventChanges:
@@ -840,21 +876,13 @@ class TestMetaEventChanges:
         
         notes = [e for e in result.events[0].voices[1] if isinstance(e, Note)]
         
-        # First F note in C major should have no accidental (or natural)
-        assert notes[0].pitches[0][0] == 'f'
-        assert notes[0].pitches[0][2] in [None, 'natural']
+        spelled = [(n.pitches[0][0], n.pitches[0][2]) for n in notes]
         
-        # Second F note in G major should have sharp
-        assert notes[1].pitches[0][0] == 'f'
-        assert notes[1].pitches[0][2] == 'sharp'
-        
-        # C note in D major should have sharp
-        assert notes[2].pitches[0][0] == 'c'
-        assert notes[2].pitches[0][2] == 'sharp'
+        # First F note in C major should have no accidental (or natural)
+        assert spelled[0] in [('f', None), ('f', 'natural')]
         
-        # F note in D major should have sharp
-        assert notes[3].pitches[0][0] == 'f'
-        assert notes[3].pitches[0][2] == 'sharp'
+        # F in G major, then C and F in D major, should all be sharp
+        assert spelled[1:] == [('f', 'sharp'), ('c', 'sharp'), ('f', 'sharp')]
     
     def test_combined_meta_event_changes(self):
         """Test that tempo, time signature, and key signature changes work together"""
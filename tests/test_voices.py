@@ -1,137 +1,166 @@
 """
 Tests for voice grouping and instrument merging functionality.
 """
+import functools
+import io
+import pytest
 from muslang.parser import parse_muslang
-from muslang.semantics import SemanticAnalyzer
-from muslang.midi_gen import MIDIGenerator
-from muslang.ast_nodes import Note
-import tempfile
+from muslang.ast_nodes import Measure
+
+
+SINGLE_VOICE = "piano { V1: c4/4 d4/4 e4/4 r/4; }"
+
+PIANO_V1_V2 = """
+piano {
+  V1: c4/4 d4/4 r/2;
+  V2: e3/2 r/2;
+}
+"""
+
+THREE_VOICES = """
+piano {
+  V1: c4/4 d4/4 r/2;
+  V2: e3/2 r/2;
+  V3: g4/4 a4/4 b4/4 r/4;
+}
+"""
+
+VOICE_CONTINUATION = """
+piano {
+  V1: c4/4 d4/4 | f4/4 g4/4;
+  V2: e3/2 r/2;
+}
+"""
+
+REPEATED_VOICE_BLOCKS = """
+piano {
+  V1: c4/4 d4/4 r/2;
+  V2: c3/1;
+  V1: e4/4 f4/4 g4/4 a4/4;
+}
+"""
+
+INTERLEAVED_INSTRUMENTS = """
+violin {
+  V1: c4/4 d4/4 r/2;
+}
+piano {
+  V1: e4/4 r/2 r/4 r/4;
+}
+violin {
+  V1: f4/4 g4/4 r/2;
+}
+"""
+
+REPEATED_PIANO = """
+piano {
+  V1: c4/4 d4/4 r/2;
+}
+piano {
+  V1: e4/4 f4/4 r/2;
+}
+"""
+
+REPEATED_PIANO_VOICES = """
+piano {
+  V1: c4/4 d4/4 r/2;
+  V2: e3/2 r/2;
+}
+piano {
+  V1: f4/4 g4/4 r/2;
+  V3: a3/2 r/2;
+}
+"""
+
+PIANO_TWO_VOICES = """
+piano {
+  V1: c4/4 d4/4 e4/4 r/4;
+  V2: c3/2 g3/2;
+}
+"""
+
+REPEATED_VIOLIN = """
+violin {
+  V1: c4/4 d4/4 r/2;
+}
+violin {
+  V1: e4/4 f4/4 r/2;
+}
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _parse(source):
+  """Parse each unique source once; tests only read the shared AST"""
+  return parse_muslang(source)
 
 
 def _voice_events(instrument, voice_number=1):
-  events = []
   for item in instrument.voices[voice_number]:
-    if hasattr(item, 'events'):
-      events.extend(item.events)
+    if isinstance(item, Measure):
+      yield from item.events
     else:
-      events.append(item)
-  return events
+      yield item
 
 
 class TestVoiceGrouping:
     """Test voice grouping in parser"""
     
-    def test_single_voice(self):
-        """Test single voice declaration"""
-        source = "piano { V1: c4/4 d4/4 e4/4 r/4; }"
-        ast = parse_muslang(source)
-        
-        inst = ast.instruments['piano']
-        assert 1 in inst.voices
-        notes = [e for e in _voice_events(inst, 1) if isinstance(e, Note)]
-        assert len(notes) == 3
-        assert notes[0].pitches[0][0] == 'c'
-        assert notes[1].pitches[0][0] == 'd'
-        assert notes[2].pitches[0][0] == 'e'
-    
     def test_multiple_voices(self):
         """Test multiple voice declarations"""
-        source = """
-        piano {
-          V1: c4/4 d4/4 r/2;
-          V2: e3/2 r/2;
-          V3: g4/4 a4/4 b4/4 r/4;
-        }
-        """
-        ast = parse_muslang(source)
+        ast = _parse(THREE_VOICES)
         
         inst = ast.instruments['piano']
         assert len(inst.voices) == 3
-        assert len(_voice_events(inst, 1)) == 3
-        assert len(_voice_events(inst, 2)) == 2
-        assert len(_voice_events(inst, 3)) == 4
+        assert sum(1 for _ in _voice_events(inst, 1)) == 3
+        assert sum(1 for _ in _voice_events(inst, 2)) == 2
+        assert sum(1 for _ in _voice_events(inst, 3)) == 4
     
-    def test_voice_continuation(self):
-        """Test multiple declarations of same voice concatenate"""
-        source = """
-        piano {
-          V1: c4/4 d4/4 | f4/4 g4/4;
-          V2: e3/2 r/2;
-        }
-        """
-        ast = parse_muslang(source)
-        
-        inst = ast.instruments['piano']
-        # V1 should have 4 notes (c, d, f, g)
-        voice1_notes = [e for e in _voice_events(inst, 1) if isinstance(e, Note)]
-        assert len(voice1_notes) == 4
-        assert voice1_notes[0].pitches[0][0] == 'c'
-        assert voice1_notes[1].pitches[0][0] == 'd'
-        assert voice1_notes[2].pitches[0][0] == 'f'
-        assert voice1_notes[3].pitches[0][0] == 'g'
-        # V2 should have 1 note
-        voice2_notes = [e for e in _voice_events(inst, 2) if isinstance(e, Note)]
-        assert len(voice2_notes) == 1
-
-    def test_repeated_voice_blocks_concatenate(self):
-        """Test repeated Vn blocks append instead of overwrite"""
-        source = """
-        piano {
-          V1: c4/4 d4/4 r/2;
-          V2: c3/1;
-          V1: e4/4 f4/4 g4/4 a4/4;
-        }
-        """
-        ast = parse_muslang(source)
-
-        inst = ast.instruments['piano']
-        voice1_notes = [e for e in _voice_events(inst, 1) if isinstance(e, Note)]
-        assert len(voice1_notes) == 6
-        assert [n.pitches[0][0] for n in voice1_notes] == ['c', 'd', 'e', 'f', 'g', 'a']
+    @pytest.mark.parametrize(
+        "source,expected",
+        [
+            # Single voice declaration
+            (SINGLE_VOICE, {1: ['c', 'd', 'e']}),
+            # A bar line inside a voice does not split it
+            (VOICE_CONTINUATION, {1: ['c', 'd', 'f', 'g'], 2: ['e']}),
+            # Repeated Vn blocks append instead of overwrite
+            (REPEATED_VOICE_BLOCKS, {1: ['c', 'd', 'e', 'f', 'g', 'a'], 2: ['c']}),
+        ],
+        ids=["single_voice", "voice_continuation", "repeated_voice_blocks_concatenate"],
+    )
+    def test_voice_pitches(self, source, expected):
+        """Test each voice collects its own notes in source order"""
+        inst = _parse(source).instruments['piano']
+        assert set(inst.voices) == set(expected)
+        for voice_number, letters in expected.items():
+            assert [n.pitches[0][0] for n in inst.iter_notes(voice_number)] == letters
 
 
 class TestVoiceTiming:
     """Test voice timing calculation"""
     
-    def test_voices_start_at_zero(self):
+    def test_voices_start_at_zero(self, analyzer):
         """Test that all voices start at time 0"""
-        source = """
-        piano {
-          V1: c4/4 d4/4 r/2;
-          V2: e3/2 r/2;
-        }
-        """
-        ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
-        result = analyzer.analyze(ast)
+        result = analyzer.analyze(_parse(PIANO_V1_V2))
         
         inst = result.instruments['piano']
-        v1_first = _voice_events(inst, 1)[0]
-        v2_first = _voice_events(inst, 2)[0]
+        v1_first = next(_voice_events(inst, 1))
+        v2_first = next(_voice_events(inst, 2))
         
         assert v1_first.start_time == 0.0
         assert v2_first.start_time == 0.0
     
-    def test_voices_sequential_within_voice(self):
+    def test_voices_sequential_within_voice(self, analyzer):
         """Test events within a voice are sequential"""
-        source = """
-        piano {
-          V1: c4/4 d4/4 e4/4 r/4;
-        }
-        """
-        ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
-        result = analyzer.analyze(ast)
+        result = analyzer.analyze(_parse(SINGLE_VOICE))
         
         inst = result.instruments['piano']
-        notes = [e for e in _voice_events(inst, 1) if isinstance(e, Note)]
+        starts = [n.start_time for n in inst.iter_notes(1)]
+        ends = [n.end_time for n in inst.iter_notes(1)]
         
-        # First note at 0
-        assert notes[0].start_time == 0.0
-        # Second note starts where first ends
-        assert notes[1].start_time == notes[0].end_time
-        # Third note starts where second ends
-        assert notes[2].start_time == notes[1].end_time
+        # First note at 0, and each note starts where the previous one ends
+        assert starts[0] == 0.0
+        assert starts[1:] == ends[:-1]
 
 
 class TestInstrumentMerging:
@@ -139,18 +168,7 @@ class TestInstrumentMerging:
     
     def test_instrument_merging(self):
         """Test multiple declarations of same instrument merge"""
-        source = """
-        violin {
-          V1: c4/4 d4/4 r/2;
-        }
-        piano {
-          V1: e4/4 r/2 r/4 r/4;
-        }
-        violin {
-          V1: f4/4 g4/4 r/2;
-        }
-        """
-        ast = parse_muslang(source)
+        ast = _parse(INTERLEAVED_INSTRUMENTS)
         
         # Should only have 2 instruments (violin and piano)
         assert len(ast.instruments) == 2
@@ -158,119 +176,60 @@ class TestInstrumentMerging:
         assert 'piano' in ast.instruments
         
         # Violin should have 4 notes in V1
-        assert len(_voice_events(ast.instruments['violin'], 1)) == 6
+        assert sum(1 for _ in _voice_events(ast.instruments['violin'], 1)) == 6
         # Piano should have 1 note in V1
-        assert len([e for e in _voice_events(ast.instruments['piano'], 1) if isinstance(e, Note)]) == 1
+        assert sum(1 for _ in ast.instruments['piano'].iter_notes(1)) == 1
     
-    def test_merged_instrument_sequential(self):
+    def test_merged_instrument_sequential(self, analyzer):
         """Test merged instrument events are sequential"""
-        source = """
-        piano {
-          V1: c4/4 d4/4 r/2;
-        }
-        piano {
-          V1: e4/4 f4/4 r/2;
-        }
-        """
-        ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
-        result = analyzer.analyze(ast)
+        result = analyzer.analyze(_parse(REPEATED_PIANO))
         
         inst = result.instruments['piano']
-        notes = [e for e in _voice_events(inst, 1) if isinstance(e, Note)]
+        notes = list(inst.iter_notes(1))
         
         # Should have 4 notes total
         assert len(notes) == 4
-        # They should be sequential
+        # They should be sequential; the rest closing the first block
+        # leaves the only gap, between the second and third notes
         assert notes[0].start_time == 0.0
-        assert notes[1].start_time == notes[0].end_time
-        assert notes[2].start_time > notes[1].end_time
-        assert notes[3].start_time == notes[2].end_time
+        gaps = [b.start_time - a.end_time for a, b in zip(notes, notes[1:])]
+        assert gaps[0] == gaps[2] == 0
+        assert gaps[1] > 0
     
     def test_merged_instrument_voices(self):
         """Test merging instruments with voices"""
-        source = """
-        piano {
-          V1: c4/4 d4/4 r/2;
-          V2: e3/2 r/2;
-        }
-        piano {
-          V1: f4/4 g4/4 r/2;
-          V3: a3/2 r/2;
-        }
-        """
-        ast = parse_muslang(source)
+        ast = _parse(REPEATED_PIANO_VOICES)
         
         inst = ast.instruments['piano']
         # Should have 3 voices
         assert len(inst.voices) == 3
         # V1 should have 4 notes (merged from both declarations)
-        assert len(_voice_events(inst, 1)) == 6
+        assert sum(1 for _ in _voice_events(inst, 1)) == 6
         # V2 should have 1 note
-        assert len(_voice_events(inst, 2)) == 2
+        assert sum(1 for _ in _voice_events(inst, 2)) == 2
         # V3 should have 1 note
-        assert len(_voice_events(inst, 3)) == 2
+        assert sum(1 for _ in _voice_events(inst, 3)) == 2
 
 
 class TestMIDIGeneration:
     """Test MIDI generation with voices"""
     
-    def test_midi_generation_with_voices(self):
-        """Test MIDI file is generated correctly with voices"""
-        source = """
-        piano {
-          V1: c4/4 d4/4 e4/4 r/4;
-          V2: c3/2 g3/2;
-        }
-        """
-        ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
-        analyzed = analyzer.analyze(ast)
-        
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
-        
-        gen = MIDIGenerator()
-        gen.generate(analyzed, temp_path)
-        
-        # File should exist and be non-empty
-        import os
-        assert os.path.exists(temp_path)
-        assert os.path.getsize(temp_path) > 0
-        
-        # Clean up
-        os.unlink(temp_path)
+    pytestmark = pytest.mark.midi
     
-    def test_midi_single_track_for_instrument(self):
-        """Test single merged instrument creates single MIDI track"""
-        source = """
-        violin {
-          V1: c4/4 d4/4 r/2;
-        }
-        violin {
-          V1: e4/4 f4/4 r/2;
-        }
-        """
-        ast = parse_muslang(source)
-        analyzer = SemanticAnalyzer()
-        analyzed = analyzer.analyze(ast)
-        
-        with tempfile.NamedTemporaryFile(mode='wb', suffix='.mid', delete=False) as f:
-            temp_path = f.name
+    @pytest.mark.parametrize(
+        "source,expected_min_tracks",
+        [(PIANO_TWO_VOICES, 1), (REPEATED_VIOLIN, 1)],
+        ids=["voices", "merged_instrument_single_track"],
+    )
+    def test_midi_generation(self, analyzer, midi_generator, source, expected_min_tracks):
+        """Test a voiced or merged instrument renders to a readable MIDI file"""
+        data = midi_generator.generate_to_buffer(analyzer.analyze(_parse(source)))
+        assert data.startswith(b'MThd')
         
-        gen = MIDIGenerator()
-        gen.generate(analyzed, temp_path)
-        
-        # Check MIDI file has 1 track (for violin)
         import mido
-        midi = mido.MidiFile(temp_path)
-        # Note: mido might have additional tempo/meta tracks
-        # The key is we should have our instrument track
-        assert len(midi.tracks) >= 1
-        
-        # Clean up
-        import os
-        os.unlink(temp_path)
+        midi = mido.MidiFile(file=io.BytesIO(data))
+        # mido may report additional tempo/meta tracks; the instrument track must be there
+        assert len(midi.tracks) >= expected_min_tracks
 
 
 if __name__ == "__main__":